@@ -0,0 +1,84 @@
+"""
+체크포인터 DB 커넥션 설정 (애플리케이션 풀 / 초기화 스크립트 공용)
+
+그래프(노드, 도구, LLM, Milvus)를 불러오지 않고도 사용할 수 있도록 분리한 모듈입니다.
+"""
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoint_connection_kwargs() -> dict:
+    """
+    체크포인터 커넥션 옵션 구성
+    
+    - 직접 연결: 체크포인트 쿼리를 첫 실행부터 prepared statement로 재사용 (prepare_threshold=0)
+    - PgBouncer(transaction mode): 서버측 prepared statement / startup options를 유지할 수 없으므로 비활성화
+    """
+    kwargs = {
+        "autocommit": True,
+        "application_name": "todac-langgraph",
+        "keepalives_idle": 60,  # 유휴 풀 커넥션이 중간 장비에 의해 끊기지 않도록 TCP keepalive
+    }
+    
+    if settings.BEHIND_PGBOUNCER:
+        kwargs["prepare_threshold"] = None
+    else:
+        kwargs["prepare_threshold"] = 0
+        
+        # 세션 파라미터: 체크포인터의 단순 INSERT/SELECT에는 JIT 컴파일 비용이 이득보다 큼
+        options = [
+            f"-c statement_timeout={settings.CHECKPOINT_STATEMENT_TIMEOUT}",
+            "-c jit=off",
+        ]
+        # 대화 체크포인트는 결제 데이터가 아니므로 옵션으로 커밋 지연(fsync 대기)을 제거할 수 있음
+        if settings.CHECKPOINT_ASYNC_COMMIT:
+            options.append("-c synchronous_commit=off")
+        kwargs["options"] = " ".join(options)
+    
+    return kwargs
+
+
+# 체크포인트 페이로드가 저장되는 TOAST 대상 컬럼 (테이블, 컬럼)
+_CHECKPOINT_PAYLOAD_COLUMNS = (
+    ("checkpoints", "checkpoint"),
+    ("checkpoint_blobs", "blob"),
+    ("checkpoint_writes", "blob"),
+)
+
+
+async def apply_checkpoint_compression(conn) -> None:
+    """
+    체크포인트 페이로드 컬럼에 lz4 TOAST 압축 적용 (Postgres 14+)
+    
+    메시지 이력이 턴마다 커지므로 기본 pglz 대신 lz4로 압축/해제 CPU를 줄입니다.
+    메타데이터만 변경하며, 이후 새로 저장되는 값부터 적용됩니다.
+    이미 lz4인 컬럼은 건너뛰므로 (ALTER의 테이블 잠금 회피) 매 부팅마다 호출해도 됩니다.
+    
+    Args:
+        conn: psycopg AsyncConnection (autocommit)
+    """
+    try:
+        cur = await conn.execute(
+            "SELECT c.relname, a.attname FROM pg_attribute a "
+            "JOIN pg_class c ON c.oid = a.attrelid "
+            "WHERE c.relname = ANY(%s) AND a.attname = ANY(%s) AND a.attcompression = 'l' "
+            "AND pg_table_is_visible(c.oid)",
+            ([t for t, _ in _CHECKPOINT_PAYLOAD_COLUMNS], [c for _, c in _CHECKPOINT_PAYLOAD_COLUMNS])
+        )
+        already_lz4 = {tuple(row) for row in await cur.fetchall()}
+    except Exception as e:
+        # attcompression이 없는 버전(Postgres 13 이하) 등
+        logger.warning("체크포인트 압축 설정 확인 실패 (건너뜀): %s", e)
+        return
+    
+    for table, column in _CHECKPOINT_PAYLOAD_COLUMNS:
+        if (table, column) in already_lz4:
+            continue
+        try:
+            await conn.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION lz4")
+        except Exception as e:
+            # lz4 미지원 빌드 등: 압축 설정만 건너뛰고 계속 진행
+            logger.warning("체크포인트 압축 설정 실패 (%s.%s): %s", table, column, e)
+            return
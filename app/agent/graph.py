@@ -4,6 +4,7 @@ Workflow 정의 (Coaching Agent - StateGraph, Edge 연결)
 from langgraph.graph import StateGraph, END, START
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from psycopg_pool import AsyncConnectionPool
+from psycopg.errors import DuplicateTable, UndefinedTable, UniqueViolation
 from app.agent.state import AgentState
 from app.agent.nodes import (
     intent_classifier_node,
@@ -15,48 +16,17 @@ from app.agent.nodes import (
     evaluate_docs_node,
     grow_response_node
 )
+from app.agent.checkpoint import apply_checkpoint_compression, checkpoint_connection_kwargs
 from app.core.config import settings
+from typing import Optional, Tuple
+from functools import lru_cache
 import asyncio
+import contextlib
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def route_intent(state: AgentState) -> str:
-    """
-    의도 분류 결과에 따른 라우팅
-    - emergency: 응급 상황 패스트트랙
-    - irrelevant: 단순 응답 후 종료 (이미 intent_classifier에서 응답 생성됨)
-    - relevant: 코칭 플로우 진입 (Ask Situation)
-    """
-    intent = state.get("_intent", "relevant")
-    
-    if intent == "emergency":
-        logger.info("🚨 응급 상황 감지 -> Emergency Fast-Track 진입")
-        return "emergency_response"
-
-    if intent == "irrelevant":
-        logger.info("🚫 질문이 아기 돌봄과 관련이 없습니다 -> 단순 응답 후 종료")
-        return END
-    
-    logger.info("✅ 질문이 관련성이 있습니다 -> Ask Situation 노드 진입")
-    return "ask_situation"
-
-
-def route_goal_selector(state: AgentState) -> str:
-    """
-    Goal Selector 결과에 따른 라우팅
-    - _goal_valid == False: 관련 없는 응답 → self-loop (다시 목표 선택 대기)
-    - _goal_valid == True: 유효한 목표 → Research Agent 진입
-    """
-    if state.get("_goal_valid") == False:
-        logger.info("🔄 목표 미설정 → goal_selector self-loop")
-        return "goal_selector"
-    
-    logger.info("✅ 목표 설정 완료 → research_agent 진입")
-    return "research_agent"
-
-
 def create_coaching_graph_builder() -> StateGraph:
     """
     코칭 에이전트 StateGraph 빌더 생성
@@ -78,16 +48,8 @@ def create_coaching_graph_builder() -> StateGraph:
     # 0. START -> 의도 분류
     workflow.add_edge(START, "intent_classifier")
     
-    # 1. 의도 분류 결과 분기
-    workflow.add_conditional_edges(
-        "intent_classifier",
-        route_intent,
-        {
-            "ask_situation": "ask_situation",
-            "emergency_response": "emergency_response",
-            END: END
-        }
-    )
+    # 1. 의도 분류 결과 분기: intent_classifier가 Command(goto)로 직접 라우팅
+    #    (emergency_response | ask_situation | END)
     
     # 2. 응급 상황 -> END
     workflow.add_edge("emergency_response", END)
@@ -98,15 +60,8 @@ def create_coaching_graph_builder() -> StateGraph:
     # 4. Goal Options -> Goal Selector (interrupt_before로 2차 멈춤)
     workflow.add_edge("goal_options", "goal_selector")
     
-    # 5. Goal Selector -> 조건부 분기 (관련 없는 응답이면 self-loop)
-    workflow.add_conditional_edges(
-        "goal_selector",
-        route_goal_selector,
-        {
-            "goal_selector": "goal_selector",
-            "research_agent": "research_agent"
-        }
-    )
+    # 5. Goal Selector -> 분기: goal_selector가 Command(goto)로 직접 라우팅
+    #    (관련 없는 응답이면 goal_selector self-loop, 유효하면 research_agent)
     
     # 6. Research Agent -> Evaluate Docs
     workflow.add_edge("research_agent", "evaluate_docs")
@@ -120,53 +75,183 @@ def create_coaching_graph_builder() -> StateGraph:
     return workflow
 
 
-# 전역 그래프 인스턴스 (한 번만 생성)
-_agent_graph = None
+# 기본 interrupt 위치 (HITL 2회: 상황 답변 대기, 목표 선택 대기)
+DEFAULT_INTERRUPT_BEFORE = ("goal_options", "goal_selector")
+
+# 전역 체크포인터 인스턴스 (이벤트 루프당 한 번만 생성)
 _checkpointer = None
-_graph_lock = asyncio.Lock()
+_checkpointer_loop: Optional[asyncio.AbstractEventLoop] = None  # 풀이 바인딩된 이벤트 루프
+_init_task: Optional[asyncio.Task] = None
+
+
+async def _setup_checkpointer_if_needed(checkpointer: AsyncPostgresSaver) -> None:
+    """
+    체크포인트 스키마가 최신이 아닐 때만 setup() 실행
+    
+    checkpoint_migrations의 최신 버전이 saver의 MIGRATIONS와 일치하면
+    매 부팅마다 DDL/마이그레이션 트랜잭션을 돌리지 않고 건너뜁니다.
+    lz4 압축 설정은 setup 생략 여부와 관계없이 확인하여 기존 배포에도 적용합니다.
+    """
+    try:
+        async with checkpointer.conn.connection() as conn:
+            cur = await conn.execute(
+                "SELECT v FROM checkpoint_migrations ORDER BY v DESC LIMIT 1"
+            )
+            row = await cur.fetchone()
+        
+        schema_up_to_date = row is not None and row[0] == len(checkpointer.MIGRATIONS) - 1
+    except UndefinedTable:
+        # 최초 실행: 마이그레이션 테이블 자체가 없음
+        schema_up_to_date = False
+    
+    if schema_up_to_date:
+        logger.info("ℹ️ 체크포인트 스키마 최신 상태 -> setup 생략")
+    else:
+        try:
+            await checkpointer.setup()
+        except (DuplicateTable, UniqueViolation) as e:
+            # 여러 워커가 동시에 부팅하며 같은 DDL을 실행한 경우 (다른 워커가 이미 생성)
+            logger.warning("체크포인트 스키마 동시 생성 감지 (무시하고 진행): %s", e)
+    
+    # 압축 설정은 마이그레이션 여부와 무관하게 확인 (기존 배포에도 적용, 이미 lz4면 변경 없음)
+    async with checkpointer.conn.connection() as conn:
+        await apply_checkpoint_compression(conn)
 
 
-async def get_agent_graph():
+async def _init_checkpointer() -> AsyncPostgresSaver:
+    """체크포인터 풀 생성 + 스키마 준비 (이벤트 루프당 1회)"""
+    global _checkpointer, _checkpointer_loop
+    
+    db_uri = settings.DATABASE_URL
+    
+    pool = AsyncConnectionPool(
+        conninfo=db_uri,
+        min_size=settings.CHECKPOINT_POOL_MIN,
+        max_size=settings.CHECKPOINT_POOL_MAX,
+        timeout=settings.CHECKPOINT_POOL_TIMEOUT,
+        kwargs=checkpoint_connection_kwargs(),
+        open=False
+    )
+    # min_size 만큼 커넥션을 미리 연결해두어 첫 체크포인트 쓰기에서 연결 지연이 없도록 함
+    await pool.open(wait=True)
+    
+    checkpointer = AsyncPostgresSaver(conn=pool)
+    
+    # 커넥션 풀 사용 시 쿼리마다 별도 커넥션을 빌려오므로 인스턴스 Lock이 불필요함
+    # (Lock이 남아 있으면 모든 세션의 체크포인트 I/O가 직렬화됨)
+    if isinstance(checkpointer.conn, AsyncConnectionPool):
+        checkpointer.lock = contextlib.nullcontext()
+    
+    if settings.CHECKPOINT_SKIP_SETUP:
+        logger.info("ℹ️ CHECKPOINT_SKIP_SETUP=True -> 체크포인트 setup 생략")
+    else:
+        await _setup_checkpointer_if_needed(checkpointer)
+    
+    logger.info("✅ AsyncPostgresSaver 체크포인터 초기화 완료")
+    _checkpointer = checkpointer
+    _checkpointer_loop = asyncio.get_running_loop()
+    return checkpointer
+
+
+@lru_cache(maxsize=8)
+def _compile_graph(checkpointer: AsyncPostgresSaver, interrupt_before: Tuple[str, ...]):
+    """
+    그래프 컴파일 (설정 조합별 캐시)
+    
+    같은 (checkpointer, interrupt_before) 조합은 한 번만 컴파일하고 재사용합니다.
+    동기 함수이므로 이벤트 루프 안에서 별도 Lock 없이 원자적으로 캐시가 채워집니다.
     """
-    에이전트 그래프 인스턴스 가져오기 (싱글톤, async + Lock)
+    builder = create_coaching_graph_builder()
     
-    interrupt 위치:
+    graph = builder.compile(
+        checkpointer=checkpointer,
+        interrupt_before=list(interrupt_before)
+    )
+    
+    logger.info("✅ 코칭 그래프 컴파일 완료 (interrupt_before=%s)", list(interrupt_before))
+    return graph
+
+
+def _discard_stale_checkpointer() -> None:
+    """
+    다른 이벤트 루프에 바인딩된 기존 체크포인터 정리
+    
+    풀은 생성된 루프에서만 닫을 수 있으므로, 그 루프가 아직 실행 중이면 해당 루프에 close를 예약하고
+    이미 멈췄거나 닫힌 루프라면 경고만 남기고 참조를 해제합니다.
+    """
+    global _checkpointer, _checkpointer_loop
+    
+    checkpointer, old_loop = _checkpointer, _checkpointer_loop
+    _checkpointer = None
+    _checkpointer_loop = None
+    _compile_graph.cache_clear()
+    
+    if checkpointer is None:
+        return
+    
+    if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(checkpointer.conn.close(), old_loop)
+        logger.info("ℹ️ 이전 이벤트 루프의 체크포인터 커넥션 풀 종료 예약")
+    else:
+        logger.warning("이전 이벤트 루프가 종료되어 체크포인터 커넥션 풀을 닫을 수 없음 -> 참조만 해제")
+
+
+async def get_agent_graph(interrupt_before: Tuple[str, ...] = DEFAULT_INTERRUPT_BEFORE):
+    """
+    에이전트 그래프 인스턴스 가져오기 (체크포인터 싱글톤 + 설정별 컴파일 캐시)
+    
+    동시에 들어온 첫 요청들은 Lock 경합 없이 동일한 체크포인터 초기화 Task를 await 합니다.
+    
+    interrupt 위치 (기본값):
     - goal_options 노드 진입 전: Ask Situation이 질문을 던진 후, 사용자의 상황 답변을 받기 위해 멈춤.
     - goal_selector 노드 진입 전: Goal Options가 선택지를 던진 후, 사용자의 목표 선택을 받기 위해 멈춤.
+    
+    Args:
+        interrupt_before: 실행 전 멈출 노드 목록 (A/B 테스트 등 변형 그래프용)
     """
-    global _agent_graph, _checkpointer
+    global _init_task
     
-    # Fast path: 이미 초기화된 경우 Lock 없이 바로 반환
-    if _agent_graph is not None:
-        return _agent_graph
+    loop = asyncio.get_running_loop()
     
-    # 초기화 시에만 Lock 획득 (동시 초기화 방지)
-    async with _graph_lock:
-        # Double-check: Lock 대기 중 다른 코루틴이 이미 초기화했을 수 있음
-        if _agent_graph is not None:
-            return _agent_graph
-        
-        db_uri = settings.DATABASE_URL
-        
-        pool = AsyncConnectionPool(
-            conninfo=db_uri,
-            max_size=20,
-            kwargs={"autocommit": True, "prepare_threshold": 0}
-        )
-        await pool.open()
-        
-        _checkpointer = AsyncPostgresSaver(conn=pool)
-        await _checkpointer.setup()
-        
-        logger.info("✅ AsyncPostgresSaver 체크포인터 초기화 완료")
-        
-        builder = create_coaching_graph_builder()
-        
-        _agent_graph = builder.compile(
-            checkpointer=_checkpointer,
-            interrupt_before=["goal_options", "goal_selector"]
-        )
-        
-        logger.info("✅ 코칭 그래프 컴파일 완료 (interrupt_before=['goal_options', 'goal_selector'])")
+    # Fast path: 현재 루프에 체크포인터가 준비된 경우 캐시된 그래프 바로 반환
+    if _checkpointer is not None and _checkpointer_loop is loop:
+        return _compile_graph(_checkpointer, tuple(interrupt_before))
+    
+    # 풀은 생성된 이벤트 루프에 묶이므로, 다른 루프(테스트 클라이언트 재생성 등)에서는 새로 초기화
+    # (기존 루프의 풀은 교체 전에 정리하여 커넥션이 누수되지 않도록 함)
+    if _checkpointer is not None and _checkpointer_loop is not loop:
+        _discard_stale_checkpointer()
+    
+    if _init_task is None or _init_task.get_loop() is not loop:
+        _init_task = asyncio.ensure_future(_init_checkpointer())
+    task = _init_task
+    
+    try:
+        # shield: 요청 하나가 취소되어도 공유 초기화 작업은 계속 진행
+        checkpointer = await asyncio.shield(task)
+    except Exception:
+        # 초기화 실패 시 다음 요청에서 재시도할 수 있도록 Task 해제
+        if _init_task is task:
+            _init_task = None
+        raise
+    
+    return _compile_graph(checkpointer, tuple(interrupt_before))
+
+
+async def close_agent_graph():
+    """
+    체크포인터 커넥션 풀 종료 (앱 lifespan 종료 시 호출)
+    
+    풀과 컴파일 캐시를 정리하여, 이후 호출 시 현재 루프에서 다시 초기화되도록 합니다.
+    """
+    global _checkpointer, _checkpointer_loop, _init_task
+    
+    checkpointer = _checkpointer
+    _checkpointer = None
+    _checkpointer_loop = None
+    _init_task = None
+    _compile_graph.cache_clear()
     
-    return _agent_graph
+    if checkpointer is not None:
+        await checkpointer.conn.close()
+        logger.info("✅ 체크포인터 커넥션 풀 종료")
@@ -1,10 +1,15 @@
 """
 노드 함수 (Self-RAG 구조)
 """
+from types import MappingProxyType
+from typing import List, Literal, Tuple
 from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage, AIMessage
+from langgraph.graph import END
+from langgraph.types import Command
 from app.agent.state import AgentState
 from app.agent.prompts import (
     SIMPLE_RESPONSE_PROMPT_TEMPLATE,
+    SIMPLE_REFUSAL_RESPONSE,
     INTENT_CLASSIFICATION_PROMPT_TEMPLATE,
     EMERGENCY_RESPONSE_PROMPT_TEMPLATE,
     ASK_SITUATION_PROMPT_TEMPLATE,
@@ -16,53 +21,233 @@ from app.agent.prompts import (
     get_baby_context_string,
     get_docs_context_string,
 )
-from app.agent.tools import milvus_knowledge_search, retrieve_qna
+from app.agent.tools import milvus_knowledge_search, retrieve_qna, RESEARCH_TOOLS, get_research_agent_llm
+from app.agent.retrieval_cache import cached_tool_call
 from app.services.qna_service import format_qna_docs
 from app.dto.qna import QnADoc
 from app.dto.rag import RagDoc
-from app.core.llm_factory import get_generator_llm, get_evaluator_llm
-from app.agent.utils import parse_json_from_response, track_node_execution_time
+from app.dto.agent import IntentResult, GoalOptionsResult, GoalSelectionResult, DocRelevanceVerdict
+from app.core.llm_factory import (
+    get_generator_llm,
+    get_structured_evaluator_llm,
+    get_structured_generator_llm,
+)
+from app.agent.utils import (
+    track_node_execution_time,
+    get_last_human_content,
+    find_last_human_index,
+)
+from app.core.config import settings
+import asyncio
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# 고정 시스템 프롬프트 메시지 (포맷 인자가 없으므로 모듈 로드 시 1회 생성해 재사용)
+_INTENT_SYSTEM_MESSAGE = SystemMessage(content=INTENT_CLASSIFICATION_PROMPT_TEMPLATE)
+
+# Research Agent 도구 이름 -> 도구 (LLM이 요청한 tool_call 실행용)
+_RESEARCH_TOOLS_BY_NAME = {t.name: t for t in RESEARCH_TOOLS}
+
+
+async def _execute_research_tool(tool_call: dict):
+    """
+    LLM이 요청한 도구 1개를 스레드에서 실행 (동기 Milvus 호출이 이벤트 루프를 막지 않도록, 검색 캐시 경유)
+    
+    Returns:
+        도구 .func()의 반환값 ((content, artifacts) 튜플)
+    """
+    tool = _RESEARCH_TOOLS_BY_NAME.get(tool_call["name"])
+    if tool is None:
+        raise ValueError(f"알 수 없는 도구: {tool_call['name']}")
+    return await asyncio.to_thread(cached_tool_call, tool, tool_call["args"])
+
+
+# 도구 이름 -> (artifact를 담을 state 키, 문서 DTO) 디스패치 테이블
+# artifact는 우리 도구가 직접 만든 dict이므로 DTO는 검증 없이 model_construct로 생성
+_TOOL_ARTIFACT_TARGETS = MappingProxyType({
+    "retrieve_qna": ("_qna_docs", QnADoc),
+    "milvus_knowledge_search": ("_retrieved_docs", RagDoc),
+})
+
+
+# 의도 분류 키워드 사전 필터 (모듈 로드 시 1회 컴파일)
+# 이전 대화가 없는 첫 질문 중, 도메인 키워드가 있고 위험 신호가 전혀 없는 질문만 LLM 없이 relevant로 확정합니다.
+# 위험 신호 패턴은 응급 누락을 막기 위해 의도적으로 넓게 잡습니다.
+# (의도 분류 프롬프트의 emergency 핵심 증상을 모두 포함: 의식/호흡/무호흡/청색/구토/담즙/설사/혈변/경련/강직/발열,
+#  숫자: 체온/횟수 등 수치 판단 필요, 소변 감소/악화 표현: 탈수·황달 악화 등)
+_DOMAIN_KEYWORD_RE = re.compile("|".join([
+    "미숙아", "이른둥이", "신생아", r"교정\s*연령", "수유", "분유", "모유", "젖병", "유축",
+    "이유식", "트림", "황달", "기저귀", "목욕", "낮잠", "수면", "발달", "예방접종", "배꼽", "태열",
+]))
+_RISK_SIGNAL_RE = re.compile("|".join([
+    "응급", "위급", "119", "숨", "호흡", "청색", "파랗", "창백", "의식", "기절", r"축\s*처", "처져", "늘어져",
+    "토", "담즙", "피", "혈", "경련", "강직", "떨", "열", "설사", "서맥", "질식", "사레",
+    "다쳤", "떨어졌", "화상", "삼켰", r"\d",
+    "소변", r"안\s*젖", "탈수", r"안\s*먹", r"못\s*먹", "노랗", "심해", "심하", "악화", "점점", "계속",
+]))
+
+
+def _is_obviously_relevant(question: str, messages: list) -> bool:
+    """
+    이전 대화 없음 + 도메인 키워드 포함 + 위험 신호 없음 -> 의도 분류 LLM 호출 없이 relevant
+    
+    이전 턴이 있으면 앞선 증상과 현재 내용을 결합해 판단해야 하므로 (프롬프트의 맥락 판단 규칙) 항상 LLM으로 분류합니다.
+    """
+    if len(messages) > 1:
+        return False
+    return bool(_DOMAIN_KEYWORD_RE.search(question)) and not _RISK_SIGNAL_RE.search(question)
+
+
+async def _retrieve_emergency_docs(question: str) -> Tuple[List[QnADoc], List[RagDoc]]:
+    """
+    응급 답변용 QnA + Milvus 검색 (서로 독립적인 I/O이므로 스레드에서 병렬 실행)
+    한쪽 검색이 실패해도 다른 쪽 결과는 사용합니다.
+    
+    Returns:
+        (QnA 문서 리스트, RAG 문서 리스트)
+    """
+    qna_docs = []
+    rag_docs = []
+    
+    # .func를 호출하면 데코레이터 포장을 벗기고 (content, artifact) 튜플을 직접 받습니다. (검색 캐시 경유)
+    qna_result, milvus_result = await asyncio.gather(
+        asyncio.to_thread(cached_tool_call, retrieve_qna, {"query": question}),
+        asyncio.to_thread(cached_tool_call, milvus_knowledge_search, {"query": question}),
+        return_exceptions=True
+    )
+    
+    try:
+        if isinstance(qna_result, Exception):
+            raise qna_result
+        qna_content, qna_artifacts = qna_result
+        
+        if qna_artifacts:
+            qna_docs = [QnADoc.model_construct(**d) for d in qna_artifacts]
+        logger.info("🚨 응급 QnA 검색 완료: %s", qna_content)
+    except Exception as e:
+        logger.error("응급 QnA 검색 중 오류(무시하고 진행): %s", e)
+    
+    try:
+        if isinstance(milvus_result, Exception):
+            raise milvus_result
+        milvus_content, milvus_artifacts = milvus_result
+        
+        if milvus_artifacts:
+            rag_docs = [RagDoc.model_construct(**d) for d in milvus_artifacts]
+        logger.info("🚨 응급 문서 검색 완료: %s", milvus_content)
+    except Exception as e:
+        logger.error("응급 문서 검색 중 오류(무시하고 진행): %s", e)
+    
+    return qna_docs, rag_docs
+
+
+def _build_docs_context(qna_docs: List[QnADoc], rag_docs: List[RagDoc], empty_message: str) -> str:
+    """
+    답변 생성용 문서 컨텍스트 문자열 구성 (QnA + 검색 문서)
+    
+    Args:
+        qna_docs: QnA 문서 리스트
+        rag_docs: RAG 문서 리스트
+        empty_message: 문서가 하나도 없을 때 사용할 안내 문구
+    """
+    formatted_qna = format_qna_docs(qna_docs) if qna_docs else ""
+    rag_context = get_docs_context_string(rag_docs)
+    
+    parts = []
+    if formatted_qna:
+        parts.append(f"[QnA 정보]\n{formatted_qna}\n\n")
+    if rag_context:
+        parts.append(f"[검색된 문서]\n{rag_context}\n\n")
+    return "".join(parts) or empty_message
+
+
+# 의도 분류 결과 -> 다음 노드 (정적 라우팅 테이블, 그 외 의도는 ask_situation)
+_INTENT_ROUTES = MappingProxyType({
+    "emergency": "emergency_response",  # 응급 상황 패스트트랙
+    "irrelevant": END,  # 단순 응답 후 종료 (이미 intent_classifier에서 응답 생성됨)
+})
+
+
+def route_intent(state: AgentState) -> str:
+    """
+    의도 분류 결과에 따른 다음 노드 결정
+    - emergency: 응급 상황 패스트트랙
+    - irrelevant: 단순 응답 후 종료 (이미 intent_classifier에서 응답 생성됨)
+    - relevant: 코칭 플로우 진입 (Ask Situation)
+    """
+    intent = state.get("_intent", "relevant")
+    target = _INTENT_ROUTES.get(intent, "ask_situation")
+    logger.debug("의도 라우팅: %s -> %s", intent, target)
+    return target
+
+
 @track_node_execution_time("intent_classifier")
-async def intent_classifier_node(state: AgentState) -> AgentState:
+async def intent_classifier_node(
+    state: AgentState
+) -> Command[Literal["emergency_response", "ask_situation", "__end__"]]:
     """
     의도 분류 노드
     질문이 '미숙아 돌봄' 범위인지 판단 + '부족한 정보 제공' 여부 판단
+    분류 결과에 따라 Command(goto)로 다음 노드를 직접 지정합니다.
     """
     logger.info("===== 🤖 의도 분류 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
     question = state.get("question", "")
     
-    llm = get_evaluator_llm()
+    # 명백한 육아 질문은 LLM 왕복 없이 바로 코칭 플로우로 진입
+    if settings.INTENT_KEYWORD_PREFILTER and _is_obviously_relevant(question, state.get("messages", [])):
+        logger.info("⚡ 키워드 사전 필터 -> relevant (의도 분류 LLM 생략)")
+        update["_intent"] = "relevant"
+        return Command(update=update, goto=route_intent(update))
+    
+    llm = get_structured_evaluator_llm(IntentResult)
     if not llm:
         logger.warning("평가 모델 없음, 기본값(relevant) 설정")
-        state["_intent"] = "irrelevant"
-        state["response"] = "죄송합니다. 처리 중 오류가 발생했습니다."
-        return state
+        update["_intent"] = "irrelevant"
+        update["response"] = "죄송합니다. 처리 중 오류가 발생했습니다."
+        return Command(update=update, goto=route_intent(update))
+    
+    # 위험 신호가 있는 질문만 응급 검색을 분류와 동시에 미리 시작 (응급이 아니면 취소)
+    # 취소해도 스레드에서 실행 중인 임베딩/Milvus 검색은 끝까지 수행되므로 대상 턴을 좁힙니다.
+    prefetch = (
+        asyncio.create_task(_retrieve_emergency_docs(question))
+        if settings.EMERGENCY_SPECULATIVE_RETRIEVAL and _RISK_SIGNAL_RE.search(question)
+        else None
+    )
         
     try:
 
         messages = state.get("messages", [])
-        recent_history = messages[-5:] if len(messages) > 5 else messages
-        input_messages = [SystemMessage(content=INTENT_CLASSIFICATION_PROMPT_TEMPLATE)] + recent_history
+        recent_history = messages[-5:]
+        input_messages = [_INTENT_SYSTEM_MESSAGE, *recent_history]
         
-        response = await llm.ainvoke(input_messages)
-        response_text = response.content.strip()
+        # 구조화 출력: IntentResult 인스턴스를 바로 반환 (JSON 파싱 불필요)
+        result = await llm.ainvoke(input_messages)
         
-        result = parse_json_from_response(response_text)
+        intent = result.intent
+        reason = result.reason
         
-        intent = result.get("intent", "relevant")
-        reason = result.get("reason", "")
+        logger.info("✅ 의도 분류 결과: %s (이유: %s) ✅", intent, reason)
+        update["_intent"] = intent
         
-        logger.info(f"✅ 의도 분류 결과: {intent} (이유: {reason}) ✅")
-        state["_intent"] = intent
+        # 응급: 미리 시작한 검색 결과를 emergency_response로 전달
+        if intent == "emergency" and prefetch is not None:
+            update["_qna_docs"], update["_retrieved_docs"] = await prefetch
+            update["_emergency_prefetched"] = True
         
         # irrelevant인 경우 즉시 답변 생성
         if intent == "irrelevant":
             logger.info("🚫 관련 없는 질문 -> 즉시 거절 응답 생성 🚫")
+            
+            # 거절 응답은 내용이 사실상 고정이므로 기본적으로 생성 LLM 왕복 없이 고정 문구 사용
+            if not settings.IRRELEVANT_LLM_RESPONSE:
+                update["response"] = SIMPLE_REFUSAL_RESPONSE
+                update["messages"] = [AIMessage(content=SIMPLE_REFUSAL_RESPONSE)]
+                return Command(update=update, goto=route_intent(update))
+            
             try:
                 simple_prompt = SIMPLE_RESPONSE_PROMPT_TEMPLATE.format(question=question)
                 gen_llm = get_generator_llm()
@@ -73,80 +258,62 @@ async def intent_classifier_node(state: AgentState) -> AgentState:
                         [HumanMessage(content=simple_prompt)],
                         config={"tags": ["stream_response"]}
                     )
-                    state["response"] = resp.content.strip()
-                    state["messages"] = [resp]
+                    update["response"] = resp.content.strip()
+                    update["messages"] = [resp]
                 else:
-                    state["response"] = "죄송합니다. 미숙아 및 신생아 돌봄과 관련된 질문만 답변할 수 있습니다."
+                    update["response"] = "죄송합니다. 미숙아 및 신생아 돌봄과 관련된 질문만 답변할 수 있습니다."
             except Exception as ex:
-                logger.error(f"거절 응답 생성 실패: {str(ex)}")
-                state["response"] = "죄송합니다. 처리 중 오류가 발생했습니다."
+                logger.error("거절 응답 생성 실패: %s", ex)
+                update["response"] = "죄송합니다. 처리 중 오류가 발생했습니다."
         
     except Exception as e:
-        logger.error(f"의도 분류 실패: {str(e)}")
-        state["_intent"] = "relevant"
+        logger.error("의도 분류 실패: %s", e)
+        update["_intent"] = "relevant"
+    finally:
+        if prefetch is not None and not prefetch.done():
+            prefetch.cancel()
         
-    return state
+    return Command(update=update, goto=route_intent(update))
 
 @track_node_execution_time("emergency_response")
-async def emergency_response_node(state: AgentState) -> AgentState:
+async def emergency_response_node(state: AgentState) -> dict:
     """
     [통합] 응급 상황 전용 노드 (검색 + 답변 생성)
     - 별도의 평가 노드 없이 즉시 검색하고 답변을 생성합니다.
     - 검색된 모든 문서를 LLM에게 전달하여 관련성 있는 정보만 선별해 답변하도록 합니다.
     """
     logger.info("===== 🚨 Emergency Response 노드 실행 (Fast-Track) =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
     question = state.get("question", "")
     baby_info = state.get("baby_info", {})
-    state["is_emergency"] = True
-    qna_docs = []
-    rag_docs = []
-    
-    try:
-        # 1. QnA 검색 (invoke 대신 .func 사용)
-        # .func를 호출하면 데코레이터 포장을 벗기고 (content, artifact) 튜플을 직접 받습니다.
-        qna_content, qna_artifacts = retrieve_qna.func(query=question)
-        
-        if qna_artifacts:
-            for d in qna_artifacts:
-                qna_docs.append(QnADoc(**d))
-        
-        # 2. Milvus 검색 (.func 사용)
-        # 인자를 키워드 아규먼트(kwargs) 형태로 명확히 전달하는 것이 좋습니다.
-        milvus_content, milvus_artifacts = milvus_knowledge_search.func(query=question)
-        
-        if milvus_artifacts:
-            for d in milvus_artifacts:
-                rag_docs.append(RagDoc(**d))
-
-        # 결과 저장
-        state["_qna_docs"] = qna_docs
-        state["_retrieved_docs"] = rag_docs
-        logger.info(f"🚨 응급 검색 완료: {qna_content} {milvus_content}")
-        
-    except Exception as e:
-        logger.error(f"응급 검색 중 오류(무시하고 진행): {str(e)}")
+    update["is_emergency"] = True
+    
+    # 1. QnA + Milvus 검색 (의도 분류 중 미리 검색했다면 그 결과를 재사용)
+    if state.get("_emergency_prefetched"):
+        qna_docs = state.get("_qna_docs") or []
+        rag_docs = state.get("_retrieved_docs") or []
+        logger.info("⚡ 사전 검색 결과 사용: QnA %s개, Docs %s개", len(qna_docs), len(rag_docs))
+    else:
+        qna_docs, rag_docs = await _retrieve_emergency_docs(question)
+    
+    # 결과 저장
+    update["_qna_docs"] = qna_docs
+    update["_retrieved_docs"] = rag_docs
 
-    # 3. [생성] 응급 답변 생성
+    # 2. [생성] 응급 답변 생성
     llm = get_generator_llm()
     if not llm:
-        state["response"] = "시스템 오류입니다. 즉시 119에 연락하거나 병원을 방문하세요."
-        return state
+        update["response"] = "시스템 오류입니다. 즉시 119에 연락하거나 병원을 방문하세요."
+        return update
         
     try:
         baby_context = get_baby_context_string(baby_info)
         
         # 문서 컨텍스트 구성
-        formatted_qna = format_qna_docs(qna_docs) if qna_docs else ""
-        rag_context = get_docs_context_string(rag_docs)
-        
-        docs_context = ""
-        if formatted_qna:
-            docs_context += f"[QnA 정보]\n{formatted_qna}\n\n"
-        if rag_context:
-            docs_context += f"[검색된 문서]\n{rag_context}\n\n"
-        if not docs_context:
-            docs_context = "관련된 참조 문서가 없습니다. 의학적 상식에 기반해 답변하세요."
+        docs_context = _build_docs_context(
+            qna_docs, rag_docs, "관련된 참조 문서가 없습니다. 의학적 상식에 기반해 답변하세요."
+        )
 
         prompt = EMERGENCY_RESPONSE_PROMPT_TEMPLATE.format(
             baby_context=baby_context,
@@ -155,27 +322,27 @@ async def emergency_response_node(state: AgentState) -> AgentState:
         )
         
         # 최근 대화 5개만 참조
-        messages = state.get("messages", [])
-        clean_messages = get_clean_messages_for_generation(messages)
-        recent_history = clean_messages[-5:] if len(clean_messages) > 5 else clean_messages
+        recent_history = get_clean_messages_for_generation(
+            state.get("messages", []), state.get("_last_human_idx"), limit=5
+        )
         
         response = await llm.ainvoke(
             [SystemMessage(content=prompt)] + recent_history,
             config={"tags": ["stream_response"]}
         )
         
-        state["response"] = response.content.strip()
-        state["messages"] = [response]
+        update["response"] = response.content.strip()
+        update["messages"] = [response]
         
     except Exception as e:
-        logger.error(f"응급 답변 생성 실패: {str(e)}", exc_info=True)
-        state["response"] = "죄송합니다. 오류가 발생했습니다. 즉시 가까운 병원 응급실을 방문하세요."
+        logger.error("응급 답변 생성 실패: %s", e, exc_info=True)
+        update["response"] = "죄송합니다. 오류가 발생했습니다. 즉시 가까운 병원 응급실을 방문하세요."
         
-    return state
+    return update
 
 
 @track_node_execution_time("ask_situation")
-async def ask_situation_node(state: AgentState) -> AgentState:
+async def ask_situation_node(state: AgentState) -> dict:
     """
     Ask Situation 노드 (1단계: 현재 상황 질문)
     - 사용자의 질문을 바탕으로, 현재 상황을 파악하는 공감형 질문을 생성합니다.
@@ -183,6 +350,7 @@ async def ask_situation_node(state: AgentState) -> AgentState:
     - 이후 interrupt로 사용자의 상황 답변을 기다립니다.
     """
     logger.info("===== 🗣️ Ask Situation 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
     question = state.get("question", "")
     baby_info = state.get("baby_info", {})
@@ -190,9 +358,9 @@ async def ask_situation_node(state: AgentState) -> AgentState:
     llm = get_generator_llm()
     if not llm:
         default_msg = "더 정확한 도움을 드리기 위해, 현재 아기의 상태나 상황을 조금 더 자세히 말씀해 주시겠어요?"
-        state["response"] = default_msg
-        state["messages"] = [AIMessage(content=default_msg)]
-        return state
+        update["response"] = default_msg
+        update["messages"] = [AIMessage(content=default_msg)]
+        return update
 
     try:
         baby_context = get_baby_context_string(baby_info)
@@ -203,29 +371,29 @@ async def ask_situation_node(state: AgentState) -> AgentState:
         )
         
         messages = state.get("messages", [])
-        recent_history = messages[-3:] if len(messages) > 3 else messages
+        recent_history = messages[-3:]
         
         response = await llm.ainvoke(
             [SystemMessage(content=system_prompt)] + recent_history,
             config={"tags": ["stream_response"]}
         )
         
-        state["response"] = response.content.strip()
-        state["messages"] = [response]
+        update["response"] = response.content.strip()
+        update["messages"] = [response]
         
-        logger.info(f"✅ 상황 질문 생성 완료: {state['response'][:30]}...")
+        logger.info("✅ 상황 질문 생성 완료: %s...", update['response'][:30])
         
     except Exception as e:
-        logger.error(f"Ask Situation 생성 실패: {str(e)}", exc_info=True)
+        logger.error("Ask Situation 생성 실패: %s", e, exc_info=True)
         fallback_msg = "더 정확한 조언을 위해 현재 아기 상태를 자세히 알려주시겠어요?"
-        state["response"] = fallback_msg
-        state["messages"] = [AIMessage(content=fallback_msg)]
+        update["response"] = fallback_msg
+        update["messages"] = [AIMessage(content=fallback_msg)]
     
-    return state
+    return update
 
 
 @track_node_execution_time("goal_options")
-async def goal_options_node(state: AgentState) -> AgentState:
+async def goal_options_node(state: AgentState) -> dict:
     """
     Goal Options 노드 (2단계: 목표 선택지 제시)
     - interrupt로 받은 사용자의 상황 답변을 활용하여
@@ -234,29 +402,25 @@ async def goal_options_node(state: AgentState) -> AgentState:
     - 이후 interrupt로 사용자의 목표 선택을 기다립니다.
     """
     logger.info("===== 🎯 Goal Options 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
     question = state.get("question", "")
     baby_info = state.get("baby_info", {})
-    messages = state.get("messages", [])
     
     # 1. 사용자 상황 답변 수집 (interrupt 이후 마지막 HumanMessage)
-    user_situation = ""
-    for msg in reversed(messages):
-        if isinstance(msg, HumanMessage):
-            user_situation = msg.content
-            break
+    user_situation = get_last_human_content(state)
     
     # user_current_info에도 저장 (이후 단계에서 활용)
-    state["user_current_info"] = user_situation
-    logger.info(f"📝 사용자 상황 답변: {user_situation[:50]}...")
+    update["user_current_info"] = user_situation
+    logger.info("📝 사용자 상황 답변: %s...", user_situation[:50])
     
-    llm = get_generator_llm()
+    llm = get_structured_generator_llm(GoalOptionsResult)
     if not llm:
         default_msg = "어떤 부분을 가장 먼저 도와드릴까요?\n1. 현재 상황 개선하기\n2. 관련 정보 알아보기"
-        state["response"] = default_msg
-        state["messages"] = [AIMessage(content=default_msg)]
-        state["goal_options"] = ["현재 상황 개선하기", "관련 정보 알아보기"]
-        return state
+        update["response"] = default_msg
+        update["messages"] = [AIMessage(content=default_msg)]
+        update["goal_options"] = ["현재 상황 개선하기", "관련 정보 알아보기"]
+        return update
 
     try:
         baby_context = get_baby_context_string(baby_info)
@@ -267,63 +431,60 @@ async def goal_options_node(state: AgentState) -> AgentState:
             baby_context=baby_context
         )
         
-        response = await llm.ainvoke(
+        # 구조화 출력: GoalOptionsResult 인스턴스를 바로 반환 (JSON 추출/파싱 불필요)
+        result = await llm.ainvoke(
             [SystemMessage(content=system_prompt)]
         )
         
-        result = parse_json_from_response(response.content.strip())
-        
-        empathy = result.get("empathy", "")
-        options = result.get("options", [])
-        closing = result.get("closing", "어떤 걸 먼저 도와드릴까요?")
+        empathy = result.empathy
+        options = result.options
+        closing = result.closing or "어떤 걸 먼저 도와드릴까요?"
         
         # 선택지를 state에 저장
-        state["goal_options"] = options
+        update["goal_options"] = options
         
         # 사용자에게 보여줄 메시지 구성
-        display_msg = empathy + "\n\n"
-        display_msg += "지금 가장 해결해주고 싶은 게 어떤 건가요?\n\n"
-        for i, option in enumerate(options, 1):
-            display_msg += f"{i}. {option}\n"
-        display_msg += f"\n{closing}"
+        parts = [empathy, "\n\n", "지금 가장 해결해주고 싶은 게 어떤 건가요?\n\n"]
+        parts.extend(f"{i}. {option}\n" for i, option in enumerate(options, 1))
+        parts.append(f"\n{closing}")
+        display_msg = "".join(parts)
         
         # 스트리밍 응답으로 전달
         ai_msg = AIMessage(content=display_msg)
-        state["response"] = display_msg
-        state["messages"] = [ai_msg]
+        update["response"] = display_msg
+        update["messages"] = [ai_msg]
         
-        logger.info(f"✅ 목표 선택지 {len(options)}개 생성 완료")
+        logger.info("✅ 목표 선택지 %s개 생성 완료", len(options))
         
     except Exception as e:
-        logger.error(f"Goal Options 생성 실패: {str(e)}", exc_info=True)
+        logger.error("Goal Options 생성 실패: %s", e, exc_info=True)
         fallback_options = ["현재 상황 개선 방법 알아보기", "관련 정보 자세히 알아보기"]
         fallback_msg = "어떤 부분이 가장 궁금하세요?\n\n1. 현재 상황 개선 방법 알아보기\n2. 관련 정보 자세히 알아보기\n\n번호로 골라주시거나, 원하시는 게 따로 있으면 직접 적어주셔도 돼요 😊"
-        state["response"] = fallback_msg
-        state["messages"] = [AIMessage(content=fallback_msg)]
-        state["goal_options"] = fallback_options
+        update["response"] = fallback_msg
+        update["messages"] = [AIMessage(content=fallback_msg)]
+        update["goal_options"] = fallback_options
     
-    return state
+    return update
 
 
 @track_node_execution_time("goal_selector")
-async def goal_selector_node(state: AgentState) -> AgentState:
+async def goal_selector_node(
+    state: AgentState
+) -> Command[Literal["goal_selector", "research_agent"]]:
     """
     Goal Selector 노드 (목표 선택 파싱)
     - interrupt 이후 사용자의 응답을 분석하여 목표를 설정합니다.
     - Evaluator LLM을 사용하여 번호 선택, 복수 선택, 커스텀 목표를 정확하게 파싱합니다.
+    - 관련 없는 응답이면 goal_selector로 self-loop, 유효한 목표면 research_agent로 이동합니다.
     """
     logger.info("===== 🎯 Goal Selector 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
-    messages = state.get("messages", [])
     goal_options = state.get("goal_options", [])
     question = state.get("question", "")
     
     # 1. 사용자의 목표 선택 수집 (두 번째 interrupt 이후 마지막 HumanMessage)
-    last_human_msg = ""
-    for msg in reversed(messages):
-        if isinstance(msg, HumanMessage):
-            last_human_msg = msg.content
-            break
+    last_human_msg = get_last_human_content(state)
     
     # 2. Evaluator LLM으로 최종 goal 결정
     selected_goal = last_human_msg  # 기본값: 원문 그대로
@@ -331,7 +492,7 @@ async def goal_selector_node(state: AgentState) -> AgentState:
     
     if goal_options and last_human_msg:
         try:
-            eval_llm = get_evaluator_llm()
+            eval_llm = get_structured_evaluator_llm(GoalSelectionResult)
             if eval_llm:
                 options_text = "\n".join(f"{i+1}. {opt}" for i, opt in enumerate(goal_options))
                 
@@ -340,72 +501,68 @@ async def goal_selector_node(state: AgentState) -> AgentState:
                     user_response=last_human_msg
                 )
                 
-                parse_response = await eval_llm.ainvoke([SystemMessage(content=parse_prompt)])
-                parse_result = parse_json_from_response(parse_response.content.strip())
+                parse_result = await eval_llm.ainvoke([SystemMessage(content=parse_prompt)])
                 
-                is_relevant = parse_result.get("is_relevant", True)
-                parsed_goal = parse_result.get("goal")
+                is_relevant = parse_result.is_relevant
+                parsed_goal = parse_result.goal
                 
                 if is_relevant and parsed_goal:
                     selected_goal = parsed_goal
-                    logger.info(f"🎯 LLM 파싱 결과: {selected_goal}")
+                    logger.info("🎯 LLM 파싱 결과: %s", selected_goal)
                 elif not is_relevant:
-                    logger.info(f"🚫 관련 없는 응답 감지: {last_human_msg[:30]}...")
+                    logger.info("🚫 관련 없는 응답 감지: %s...", last_human_msg[:30])
                 else:
                     logger.warning("⚠️ 목표 파싱 결과 없음, 원문 사용")
             else:
                 logger.warning("⚠️ Evaluator LLM 없음, 원문 사용")
         except Exception as parse_err:
-            logger.error(f"목표 선택 파싱 실패 (원문 사용): {parse_err}")
+            logger.error("목표 선택 파싱 실패 (원문 사용): %s", parse_err)
     
     # 3. 관련 없는 응답인 경우 → 되묻기
     if not is_relevant:
-        retry_msg = "죄송하지만 지금은 목표를 설정하는 단계예요 😊\n\n"
+        parts = ["죄송하지만 지금은 목표를 설정하는 단계예요 😊\n\n"]
         # 기존 선택지 다시 보여주기
-        for i, opt in enumerate(goal_options, 1):
-            retry_msg += f"{i}. {opt}\n"
-        retry_msg += "\n번호로 골라주시거나, 원하시는 목표를 직접 적어주세요!"
+        parts.extend(f"{i}. {opt}\n" for i, opt in enumerate(goal_options, 1))
+        parts.append("\n번호로 골라주시거나, 원하시는 목표를 직접 적어주세요!")
+        retry_msg = "".join(parts)
         
-        state["response"] = retry_msg
-        state["messages"] = [AIMessage(content=retry_msg)]
-        state["_goal_valid"] = False
+        update["response"] = retry_msg
+        update["messages"] = [AIMessage(content=retry_msg)]
+        update["_goal_valid"] = False
         logger.info("🔄 목표 재선택 요청 (goal_selector self-loop)")
-        return state
+        return Command(update=update, goto="goal_selector")
     
-    state["goal"] = selected_goal
-    state["_goal_valid"] = True
-    logger.info(f"✅ 최종 설정 목표: {selected_goal}")
+    update["goal"] = selected_goal
+    update["_goal_valid"] = True
+    logger.info("✅ 최종 설정 목표: %s", selected_goal)
     
     # user_current_info가 없으면 question 사용
     if not state.get("user_current_info"):
-        state["user_current_info"] = question
+        update["user_current_info"] = question
     
-    return state
+    return Command(update=update, goto="research_agent")
 
 
 @track_node_execution_time("research_agent")
-async def research_agent_node(state: AgentState) -> AgentState:
+async def research_agent_node(state: AgentState) -> dict:
     """
     Research Agent 노드 (Tool Binding 적용)
     - goal_selector_node에서 설정된 목표를 바탕으로
     - LLM이 필요한 도구(QnA, Milvus)를 선택하고 실행합니다.
     """
     logger.info("===== 🕵️ Research Agent 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
     question = state.get("question", "")
     baby_info = state.get("baby_info", {})
     user_current_info = state.get("user_current_info", question)
     goal = state.get("goal", "")
     
-    # 2. LLM + Tool Binding
-    llm = get_generator_llm()
-    if not llm:
+    # 2. LLM + Tool Binding (바인딩된 Runnable 싱글톤 재사용)
+    llm_with_tools = get_research_agent_llm()
+    if not llm_with_tools:
         logger.error("LLM not found")
-        return state
-
-    # 사용할 도구 리스트
-    tools = [retrieve_qna, milvus_knowledge_search]
-    llm_with_tools = llm.bind_tools(tools)
+        return update
     
     baby_context = get_baby_context_string(baby_info)
     
@@ -424,56 +581,59 @@ async def research_agent_node(state: AgentState) -> AgentState:
             config={"tags": ["tool_selection"]}
         )
         
-        qna_docs = []
-        rag_docs = []
+        # state 키별 수집 문서 (_qna_docs, _retrieved_docs)
+        collected_docs = {state_key: [] for state_key, _ in _TOOL_ARTIFACT_TARGETS.values()}
         
         # 3. 도구 실행 (Manual Execution to capture artifacts)
         if response.tool_calls:
-            logger.info(f"🛠️ 도구 호출 감지: {len(response.tool_calls)}개")
+            logger.info("🛠️ 도구 호출 감지: %s개", len(response.tool_calls))
             
-            for tool_call in response.tool_calls:
+            # 도구들은 서로 독립적인 I/O(Milvus, QnA)이므로 스레드에서 동시에 실행
+            # .func()를 사용하여 content와 artifacts(metadata)를 모두 가져옴
+            tool_calls = response.tool_calls
+            for tool_call in tool_calls:
+                logger.info("  -> Executing %s with args: %s", tool_call['name'], tool_call['args'])
+            
+            results = await asyncio.gather(
+                *(_execute_research_tool(tool_call) for tool_call in tool_calls),
+                return_exceptions=True
+            )
+            
+            for tool_call, result in zip(tool_calls, results):
                 name = tool_call["name"]
-                args = tool_call["args"]
-                logger.info(f"  -> Executing {name} with args: {args}")
-                
                 try:
-                    if name == "retrieve_qna":
-                        # .func()를 사용하여 content와 artifacts(metadata)를 모두 가져옴
-                        content, artifacts = retrieve_qna.func(**args)
-                        if artifacts:
-                            for d in artifacts:
-                                qna_docs.append(QnADoc(**d))
-                                
-                    elif name == "milvus_knowledge_search":
-                        content, artifacts = milvus_knowledge_search.func(**args)
-                        if artifacts:
-                            for d in artifacts:
-                                rag_docs.append(RagDoc(**d))
+                    if isinstance(result, Exception):
+                        raise result
+                    
+                    content, artifacts = result
+                    if artifacts:
+                        state_key, doc_cls = _TOOL_ARTIFACT_TARGETS[name]
+                        collected_docs[state_key].extend(doc_cls.model_construct(**d) for d in artifacts)
                 except Exception as tool_err:
-                    logger.error(f"❌ 도구 실행 실패 ({name}): {tool_err}")
+                    logger.error("❌ 도구 실행 실패 (%s): %s", name, tool_err)
                     
         else:
             logger.info("⚠️ 도구 호출 없음: LLM이 검색이 필요없다고 판단하거나 실패함.")
             
         # 결과 저장
-        state["_qna_docs"] = qna_docs
-        state["_retrieved_docs"] = rag_docs
-        logger.info(f"✅ Research 완료: QnA {len(qna_docs)}개, Docs {len(rag_docs)}개")
+        update.update(collected_docs)
+        logger.info("✅ Research 완료: QnA %s개, Docs %s개", len(update['_qna_docs']), len(update['_retrieved_docs']))
         
     except Exception as e:
-        logger.error(f"Research Agent 실패: {e}", exc_info=True)
+        logger.error("Research Agent 실패: %s", e, exc_info=True)
         
-    return state
+    return update
 
 
 @track_node_execution_time("evaluate_docs")
-async def evaluate_docs_node(state: AgentState) -> AgentState:
+async def evaluate_docs_node(state: AgentState) -> dict:
     """
     Evaluate Docs 노드
     - 검색된 문서들을 LLM으로 평가하여, 관련 있는 문서의 인덱스만 선별합니다.
     - 선별된 인덱스에 해당하는 원본 문서만 state에 남깁니다.
     """
     logger.info("===== 🧐 Evaluate Docs 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     
     question = state.get("question", "")
     goal = state.get("goal", "")
@@ -486,35 +646,35 @@ async def evaluate_docs_node(state: AgentState) -> AgentState:
     # 1. 문서가 하나도 없으면 바로 통과
     if not rag_docs and not qna_docs:
         logger.info("ℹ️ 검색된 문서 없음 -> 평가 생략")
-        return state
+        return update
+    
+    # 문서 선별을 GROW 답변 생성에 위임 (프롬프트의 '관련 없는 문서는 무시' 원칙)
+    if settings.FUSE_DOC_EVALUATION:
+        logger.info("ℹ️ FUSE_DOC_EVALUATION=True -> 평가 생략, 답변 생성 시 선별")
+        return update
 
-    llm = get_evaluator_llm()
+    llm = get_structured_evaluator_llm(DocRelevanceVerdict)
     if not llm:
         logger.warning("평가 모델 없음 -> 모든 문서 그대로 사용")
-        return state
+        return update
 
     try:
         baby_context = get_baby_context_string(baby_info)
         
         # 2. QnA 문서 목록 텍스트 생성 (번호 포함)
-        qna_docs_list = "없음"
-        if qna_docs:
-            lines = []
-            for i, doc in enumerate(qna_docs):
-                q = doc.get("question", "") if isinstance(doc, dict) else getattr(doc, "question", "")
-                a = doc.get("answer", "") if isinstance(doc, dict) else getattr(doc, "answer", "")
-                lines.append(f"[{i}] Q: {q}\n    A: {a[:200]}...")
-            qna_docs_list = "\n".join(lines)
+        # 문서는 model_construct(검증 없음)로 만들어지므로 필드가 빠져 있을 수 있어 기본값으로 접근
+        qna_docs_list = "\n".join(
+            f"[{i}] Q: {getattr(doc, 'question', '') or ''}\n"
+            f"    A: {(getattr(doc, 'answer', '') or '')[:200]}..."
+            for i, doc in enumerate(qna_docs)
+        ) or "없음"
         
         # 3. RAG 문서 목록 텍스트 생성 (번호 포함)
-        rag_docs_list = "없음"
-        if rag_docs:
-            lines = []
-            for i, doc in enumerate(rag_docs):
-                content = doc.get("content", "") if isinstance(doc, dict) else getattr(doc, "content", "")
-                filename = doc.get("filename", "N/A") if isinstance(doc, dict) else getattr(doc, "filename", "N/A")
-                lines.append(f"[{i}] (출처: {filename}) {content[:300]}...")
-            rag_docs_list = "\n".join(lines)
+        rag_docs_list = "\n".join(
+            f"[{i}] (출처: {getattr(doc, 'filename', None) or 'N/A'}) "
+            f"{(getattr(doc, 'content', '') or '')[:300]}..."
+            for i, doc in enumerate(rag_docs)
+        ) or "없음"
         
         # 4. 프롬프트 구성 및 LLM 호출
         prompt = EVALUATE_DOCS_PROMPT_TEMPLATE.format(
@@ -526,49 +686,50 @@ async def evaluate_docs_node(state: AgentState) -> AgentState:
             rag_docs_list=rag_docs_list
         )
         
-        response = await llm.ainvoke([SystemMessage(content=prompt)])
-        result = parse_json_from_response(response.content.strip())
+        # 구조화 출력: DocRelevanceVerdict 인스턴스를 바로 반환 (JSON 파싱 불필요)
+        verdict = await llm.ainvoke([SystemMessage(content=prompt)])
         
         # 5. 인덱스 기반 필터링
-        relevant_qna_indices = result.get("relevant_qna_indices", [])
-        relevant_rag_indices = result.get("relevant_rag_indices", [])
-        reason = result.get("reason", "")
+        relevant_qna_indices = verdict.relevant_qna_indices
+        relevant_rag_indices = verdict.relevant_rag_indices
+        reason = verdict.reason
         
         # QnA 필터링
         if qna_docs and relevant_qna_indices:
             filtered_qna = [qna_docs[i] for i in relevant_qna_indices if i < len(qna_docs)]
-            state["_qna_docs"] = filtered_qna
-            logger.info(f"📋 QnA 필터링: {len(qna_docs)} -> {len(filtered_qna)}개")
+            update["_qna_docs"] = filtered_qna
+            logger.info("📋 QnA 필터링: %s -> %s개", len(qna_docs), len(filtered_qna))
         elif qna_docs and not relevant_qna_indices:
-            state["_qna_docs"] = []
-            logger.info(f"📋 QnA 필터링: {len(qna_docs)} -> 0개 (관련 없음)")
+            update["_qna_docs"] = []
+            logger.info("📋 QnA 필터링: %s -> 0개 (관련 없음)", len(qna_docs))
         
         # RAG 필터링
         if rag_docs and relevant_rag_indices:
             filtered_rag = [rag_docs[i] for i in relevant_rag_indices if i < len(rag_docs)]
-            state["_retrieved_docs"] = filtered_rag
-            logger.info(f"📄 RAG 필터링: {len(rag_docs)} -> {len(filtered_rag)}개")
+            update["_retrieved_docs"] = filtered_rag
+            logger.info("📄 RAG 필터링: %s -> %s개", len(rag_docs), len(filtered_rag))
         elif rag_docs and not relevant_rag_indices:
-            state["_retrieved_docs"] = []
-            logger.info(f"📄 RAG 필터링: {len(rag_docs)} -> 0개 (관련 없음)")
+            update["_retrieved_docs"] = []
+            logger.info("📄 RAG 필터링: %s -> 0개 (관련 없음)", len(rag_docs))
         
-        logger.info(f"✅ 문서 평가 완료 (사유: {reason})")
+        logger.info("✅ 문서 평가 완료 (사유: %s)", reason)
         
     except Exception as e:
-        logger.error(f"문서 평가 실패: {str(e)}", exc_info=True)
+        logger.error("문서 평가 실패: %s", e, exc_info=True)
         # 실패 시 원본 그대로 유지
         
-    return state
+    return update
 
 
 @track_node_execution_time("response_node")
-async def grow_response_node(state: AgentState) -> AgentState:
+async def grow_response_node(state: AgentState) -> dict:
     """
     Response Node (GROW 모델 적용)
     - 수집된 정보(Baby Info, User Reality, Goal, Docs)를 바탕으로
     - GROW 모델 프롬프트에 따라 최종 답변을 생성합니다.
     """
     logger.info("===== 🌱 GROW Response 노드 실행 =====")
+    update = {}  # 이 노드에서 변경한 키만 반환 (messages는 add_messages reducer가 append)
     question = state.get("question", "")
     goal = state.get("goal", "")
     user_current_info = state.get("user_current_info", "")
@@ -578,22 +739,14 @@ async def grow_response_node(state: AgentState) -> AgentState:
     rag_docs = state.get("_retrieved_docs", [])
     qna_docs = state.get("_qna_docs", [])
     
-    # 문서 컨텍스트 구성
-    formatted_qna = format_qna_docs(qna_docs) if qna_docs else ""
-    rag_context = get_docs_context_string(rag_docs)
-    
-    docs_context = ""
-    if formatted_qna: docs_context += f"[QnA 정보]\n{formatted_qna}\n\n"
-    if rag_context: docs_context += f"[검색된 문서]\n{rag_context}\n\n"
-    if not docs_context: docs_context = "관련 문서 없음 (의학적 상식에 기반하여 답변)"
-    
     llm = get_generator_llm()
     if not llm:
-        state["response"] = "죄송합니다. 답변을 생성할 수 없습니다."
-        return state
+        update["response"] = "죄송합니다. 답변을 생성할 수 없습니다."
+        return update
         
     try:
-        # 문서 컨텍스트 구성 (이미 위에서 docs_context로 준비됨)
+        # 문서 컨텍스트 구성
+        docs_context = _build_docs_context(qna_docs, rag_docs, "관련 문서 없음 (의학적 상식에 기반하여 답변)")
         
         baby_context = get_baby_context_string(baby_info)
         
@@ -606,9 +759,10 @@ async def grow_response_node(state: AgentState) -> AgentState:
             question=question
         )
         
-        messages = state.get("messages", [])
-        clean_messages = get_clean_messages_for_generation(messages)
-        recent_history = clean_messages[-5:] # 최근 대화 일부 포함
+        # 최근 대화 일부 포함
+        recent_history = get_clean_messages_for_generation(
+            state.get("messages", []), state.get("_last_human_idx"), limit=5
+        )
         
         # 시스템 프롬프트 + 히스토리 -> 답변 생성
         response = await llm.ainvoke(
@@ -616,26 +770,28 @@ async def grow_response_node(state: AgentState) -> AgentState:
             config={"tags": ["stream_response"]}
         )
         
-        state["response"] = response.content.strip()
+        update["response"] = response.content.strip()
         # 답변을 마지막 메시지로 추가
-        state["messages"] = [response]
+        update["messages"] = [response]
         
         logger.info("✅ GROW 답변 생성 완료")
         
     except Exception as e:
-        logger.error(f"GROW 답변 생성 실패: {str(e)}", exc_info=True)
-        state["response"] = "죄송합니다. 답변 생성 중 오류가 발생했습니다."
-        state["messages"] = [AIMessage(content=state["response"])]
+        logger.error("GROW 답변 생성 실패: %s", e, exc_info=True)
+        update["response"] = "죄송합니다. 답변 생성 중 오류가 발생했습니다."
+        update["messages"] = [AIMessage(content=update["response"])]
         
-    return state
+    return update
 
 
-def get_clean_messages_for_generation(messages):
+def get_clean_messages_for_generation(messages, last_human_idx=None, limit=None):
     """
     메시지 히스토리에서 최근 HumanMessage까지만 남기고 그 이후의 Agent 활동 로그는 제거
     
     Args:
         messages: 메시지 리스트
+        last_human_idx: 이번 턴 HumanMessage 인덱스 (state["_last_human_idx"], 있으면 역순 탐색 생략)
+        limit: 반환할 최근 메시지 최대 개수 (None이면 전체)
     
     Returns:
         정리된 메시지 리스트
@@ -643,22 +799,16 @@ def get_clean_messages_for_generation(messages):
     if not messages:
         return []
     
-    # 1. 뒤에서부터 탐색하여 '가장 최근의 HumanMessage' 인덱스 찾기
-    last_human_index = -1
-    for i, msg in enumerate(reversed(messages)):
-        if isinstance(msg, HumanMessage):
-            # reversed 상태이므로 원래 인덱스로 변환
-            last_human_index = len(messages) - 1 - i
-            break
+    # 1. 기록된 인덱스가 유효하면 그대로 사용, 아니면 뒤에서부터 '가장 최근의 HumanMessage' 탐색
+    last_human_index = find_last_human_index(messages, last_human_idx)
             
     # 2. HumanMessage가 없다면? (예외처리)
     if last_human_index == -1:
         return messages[-10:]  # 그냥 최근꺼 반환
         
     # 3. [핵심] 마지막 질문까지만 남기고, 그 뒤의 Agent 활동 로그는 전부 삭제
-    clean_history = messages[:last_human_index + 1]
+    # limit이 있으면 필요한 구간만 잘라 전체 이력 복사를 피함
+    start = max(0, last_human_index + 1 - limit) if limit else 0
+    clean_history = messages[start:last_human_index + 1]
     
     return clean_history
-
-
-
@@ -1,7 +1,11 @@
 """
 시스템 프롬프트 (페르소나 및 프롬프트 템플릿 정의)
+
+모든 템플릿은 고정 지침을 앞에, 요청마다 바뀌는 값(질문, 아기 정보, 문서)을 맨 뒤에 둡니다.
+프롬프트 앞부분이 요청 간에 동일해야 LLM 제공자의 프롬프트 캐시(prefix cache)가 적중합니다.
 """
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 
 # =============================================================================
 # 1. IntentClassificationNode (의도 분류)
@@ -39,14 +43,21 @@ INTENT_CLASSIFICATION_PROMPT_TEMPLATE = """당신은 미숙아/신생아 돌봄
 SIMPLE_RESPONSE_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 의료 챗봇 'TODAC'입니다.
 사용자의 질문이 당신의 전문 분야(아기 돌봄/건강)와 관련이 없어 답변할 수 없음을 정중하게 알리세요.
 
-사용자 질문: {question}
-
 [지침]
 1. "저는 미숙아와 신생아 돌봄을 돕는 AI 챗봇입니다."라고 정체성을 밝히세요.
 2. 아기 건강이나 육아와 관련된 질문을 해달라고 부드럽게 유도하세요.
 3. 짧고 간결하게 답변하세요.
+
+사용자 질문: {question}
 """
 
+# 범위 밖 질문 고정 거절 응답 (LLM 호출 없이 즉시 반환)
+SIMPLE_REFUSAL_RESPONSE = (
+    "저는 미숙아와 신생아 돌봄을 돕는 AI 챗봇입니다. 😊\n"
+    "아쉽지만 그 질문에는 답변드리기 어려워요. "
+    "아기의 수유, 수면, 발달, 건강 등 돌봄과 관련된 궁금한 점을 물어봐 주시면 자세히 도와드릴게요!"
+)
+
 # =============================================================================
 # 3. EmergencyResponseNode (긴급 응답)
 # =============================================================================
@@ -82,12 +93,6 @@ ASK_SITUATION_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 육
 사용자가 아기 돌봄에 대한 고민을 이야기했습니다. 
 더 정확한 도움을 드리기 위해, 현재 상황을 파악하는 질문을 해주세요.
 
-[아기 정보]
-{baby_context}
-
-[사용자 질문]
-{question}
-
 [지침]
 1. 사용자의 고민에 짧게 공감해주세요. (1문장)
 2. 현재 상황을 구체적으로 파악하기 위한 질문을 2~3개 해주세요.
@@ -97,6 +102,12 @@ ASK_SITUATION_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 육
      · 빈도/정도: 얼마나 자주, 어느 정도인지
      · 시도한 것: 이미 해본 방법이 있는지
 3. 부모가 답변하기 편하도록 친절하고 부드러운 어조를 사용하세요.
+
+[아기 정보]
+{baby_context}
+
+[사용자 질문]
+{question}
 """
 
 # =============================================================================
@@ -105,15 +116,6 @@ ASK_SITUATION_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 육
 GOAL_OPTIONS_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 육아 코치 'TODAC'입니다.
 사용자의 최초 질문과 현재 상황 답변을 분석하여, 오늘 함께 해결할 수 있는 구체적인 목표를 2~3개 선택지로 제시해주세요.
 
-[아기 정보]
-{baby_context}
-
-[사용자 최초 질문]
-{question}
-
-[사용자의 현재 상황 답변]
-{user_situation}
-
 [지침]
 1. 사용자의 상황 답변에 짧게 공감해주세요. (1문장)
 2. [사용자 최초 질문]과 [사용자의 현재 상황 답변]을 종합하여, 지금 가장 도움이 될 수 있는 구체적인 목표를 **정확히 2~3개** 제시하세요.
@@ -148,6 +150,15 @@ GOAL_OPTIONS_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 육
     ],
     "closing": "번호로 골라주시거나, 원하시는 게 따로 있으면 직접 적어주셔도 돼요 😊"
 }}
+
+[아기 정보]
+{baby_context}
+
+[사용자 최초 질문]
+{question}
+
+[사용자의 현재 상황 답변]
+{user_situation}
 """
 
 # =============================================================================
@@ -155,12 +166,6 @@ GOAL_OPTIONS_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 육
 # =============================================================================
 PARSE_GOAL_SELECTION_PROMPT = """사용자의 응답을 분석하여 최종 목표를 결정하세요.
 
-[제시된 목표 선택지]
-{options_text}
-
-[사용자 응답]
-{user_response}
-
 [지침]
 1. 사용자가 번호(예: "1", "1번", "1번으로 해줘")로 선택한 경우, 해당 번호의 목표 텍스트를 goal에 넣으세요.
 2. 사용자가 여러 번호를 선택한 경우(예: "1번이랑 2번"), 해당 목표들을 합쳐서 하나의 문장으로 만드세요.
@@ -180,6 +185,12 @@ PARSE_GOAL_SELECTION_PROMPT = """사용자의 응답을 분석하여 최종 목
 - "1번과 2번 모두" → {{"goal": "밤에 자주 깨는 횟수 줄이기 + 스스로 잠들 수 있게 돕기", "is_relevant": true}}
 - "수유량 늘리고 싶어요" → {{"goal": "수유량 늘리기", "is_relevant": true}}
 - "오늘 날씨 어때?" → {{"goal": null, "is_relevant": false}}
+
+[제시된 목표 선택지]
+{options_text}
+
+[사용자 응답]
+{user_response}
 """
 
 # =============================================================================
@@ -250,18 +261,6 @@ EVALUATE_DOCS_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 의
 2. **신뢰성**: 미숙아/신생아 돌봄에 대한 의학적/전문적 근거가 있는가?
 3. **유용성**: 부모가 실제로 실천할 수 있는 해결책이나 정보를 담고 있는가?
 
-[입력 정보]
-- 사용자 질문: {question}
-- 설정된 목표: {goal}
-- 사용자 현재 상황: {user_current_info}
-- 미숙아 정보: {baby_context}
-
-[QnA 문서 목록]
-{qna_docs_list}
-
-[RAG 문서 목록]
-{rag_docs_list}
-
 [지침]
 1. QnA 문서와 RAG 문서를 각각 분석하세요.
 2. 질문과 목표 해결에 **유용한 문서의 번호(0부터 시작)**만 선택하세요.
@@ -274,32 +273,33 @@ EVALUATE_DOCS_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 전문 의
     "relevant_rag_indices": [1],
     "reason": "선별 이유 간단 설명"
 }}
+
+[입력 정보]
+- 사용자 질문: {question}
+- 설정된 목표: {goal}
+- 사용자 현재 상황: {user_current_info}
+- 미숙아 정보: {baby_context}
+
+[QnA 문서 목록]
+{qna_docs_list}
+
+[RAG 문서 목록]
+{rag_docs_list}
 """
 
 # =============================================================================
 # 8. GROWResponseNode (GROW 답변 생성)
 # =============================================================================
 GROW_RESPONSE_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 부모님을 위한 전문 '육아 코치'이자 의료 챗봇 'TODAC'입니다.
-사용자의 질문에 대해 <context> 태그 안에 제공된 정보를 바탕으로 답변하세요.
-
-<context>
-아기 정보:
-{baby_context}
-
-사용자 현재 정보(Reality):
-{user_current_info}
-
-참조 문서:
-{docs_context}
-</context>
+사용자의 질문에 대해 맨 아래 <context> 태그 안에 제공된 정보를 바탕으로 답변하세요.
 
 [참조 문서 활용 원칙]
 1. <context>의 내용을 최우선으로 반영하되, 문서에 없는 내용은 보편적인 미숙아 케어 가이드라인을 참고하세요.
 2. 할루시네이션(없는 사실 지어내기)을 절대 금지합니다.
+3. 참조 문서 중 설정된 목표나 최초 질문과 관련 없는 문서는 조용히 무시하세요.
 
 [작성 규칙]
-- 설정된 목표: "{goal}"
-- 최초 질문: "{question}"
+- <context>의 설정된 목표와 최초 질문을 기준으로 작성하세요.
 - [Options]의 각 대안은 "무엇을, 어떻게, 어느 정도로" 하는지 바로 행동할 수 있도록 **오늘 당장 실천 가능한 수준**으로 구체적이어야 합니다.
 - [절대 금지] "수면 환경 조성", "일관된 루틴" 같은 추상적/뭉뚱그린 조언 금지.
 - [Resource]에서는 왜 그런 현상이 발생하는지 의학적/발달적 배경을 알기 쉽게 설명하고, 교정연령을 고려한 조언을 포함하세요.
@@ -325,6 +325,20 @@ GROW_RESPONSE_PROMPT_TEMPLATE = """당신은 미숙아(이른둥이) 부모님
 (최초 질문에 대한 직접적이고 명확한 답변. 의학적/발달적 배경 설명 포함)
 
 ---출력 템플릿 끝---
+
+<context>
+설정된 목표: "{goal}"
+최초 질문: "{question}"
+
+아기 정보:
+{baby_context}
+
+사용자 현재 정보(Reality):
+{user_current_info}
+
+참조 문서:
+{docs_context}
+</context>
 """
 
 # =============================================================================
@@ -339,16 +353,39 @@ MARKDOWN_CLEANUP_PROMPT = """다음 Markdown 문서를 보정하세요.
 # =============================================================================
 
 def get_baby_context_string(baby_info: Dict[str, Any]) -> str:
-    """아기 정보 컨텍스트 문자열 생성"""
-    corrected_age_months = baby_info.get("corrected_age_months", 0)
+    """
+    아기 정보 컨텍스트 문자열 생성
+    
+    한 턴에서 여러 노드가 같은 아기 정보로 호출하므로,
+    렌더링에 쓰이는 필드만 해시 가능한 키로 묶어 결과를 재사용합니다.
+    """
+    medical_history = baby_info.get('medical_history')
     
+    return _render_baby_context(
+        baby_info.get('name', '아기'),
+        baby_info.get('gender', '알 수 없음'),
+        baby_info.get("corrected_age_months", 0),
+        baby_info.get('birth_weight', 'N/A'),
+        tuple(medical_history) if medical_history else (),
+    )
+
+
+@lru_cache(maxsize=256)
+def _render_baby_context(
+    name: Any,
+    gender: Any,
+    corrected_age_months: Any,
+    birth_weight: Any,
+    medical_history: Tuple[str, ...],
+) -> str:
+    """아기 정보 컨텍스트 렌더링 (필드 조합별 캐시)"""
     return f"""
 [아기 정보]
-- 이름: {baby_info.get('name', '아기')}
-- 성별: {baby_info.get('gender', '알 수 없음')}
+- 이름: {name}
+- 성별: {gender}
 - 교정 연령: {corrected_age_months}개월 
-- 출생 체중: {baby_info.get('birth_weight', 'N/A')}kg
-- 기저질환: {', '.join(baby_info.get('medical_history', [])) if baby_info.get('medical_history') else '없음'}
+- 출생 체중: {birth_weight}kg
+- 기저질환: {', '.join(medical_history) if medical_history else '없음'}
 """
 
 def get_docs_context_string(retrieved_docs: list) -> str:
@@ -356,7 +393,7 @@ def get_docs_context_string(retrieved_docs: list) -> str:
     if not retrieved_docs:
         return ""
         
-    docs_context = "\n[참조 문서]\n"
+    parts = ["\n[참조 문서]\n"]
     for i, doc in enumerate(retrieved_docs[:3], 1):
         # 객체(Pydantic)인 경우와 딕셔너리인 경우 모두 처리
         # getattr로 먼저 시도하고, 없으면(AttributeError가 아니라 None 반환 시 대비) 딕셔너리 접근 시도
@@ -371,6 +408,6 @@ def get_docs_context_string(retrieved_docs: list) -> str:
             filename = doc.get('filename', 'N/A')
             category = doc.get('category', 'N/A')
             
-        docs_context += f"{i}. {content}\n"
-        docs_context += f"   (출처: {filename}, 카테고리: {category})\n"
-    return docs_context
\ No newline at end of file
+        parts.append(f"{i}. {content}\n")
+        parts.append(f"   (출처: {filename}, 카테고리: {category})\n")
+    return "".join(parts)
\ No newline at end of file
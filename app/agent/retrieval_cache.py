@@ -0,0 +1,106 @@
+"""
+검색 도구 결과 캐시 (QnA / Milvus)
+같은 질의(공백 정규화 기준)에 대한 검색 결과를 짧은 TTL 동안 재사용합니다.
+
+캐시는 프로세스별 메모리에 있으므로 clear_retrieval_cache()는 호출한 프로세스에만 적용됩니다.
+다른 워커/프로세스(예: TaskIQ 워커의 문서 적재)에서 바뀐 지식베이스는 최대 RETRIEVAL_CACHE_TTL 이후 반영됩니다.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCache:
+    """
+    TTL + LRU 검색 결과 캐시 (스레드 안전)
+
+    검색 도구는 asyncio.to_thread로 여러 스레드에서 동시에 호출되므로 Lock으로 보호합니다.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """만료되지 않은 캐시 값 반환 (없으면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """값 저장 (용량 초과 시 가장 오래 사용되지 않은 항목 제거)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """전체 캐시 비우기 (문서 삭제 등 지식베이스 변경 시)"""
+        with self._lock:
+            self._entries.clear()
+
+
+_retrieval_cache = RetrievalCache(
+    maxsize=settings.RETRIEVAL_CACHE_SIZE,
+    ttl=settings.RETRIEVAL_CACHE_TTL
+)
+
+
+def _make_key(tool_name: str, args: Dict[str, Any]) -> Hashable:
+    """캐시 키: (도구 이름, 공백 정규화된 인자)"""
+    normalized = tuple(sorted(
+        (k, " ".join(v.split()) if isinstance(v, str) else v)
+        for k, v in args.items()
+    ))
+    return tool_name, normalized
+
+
+def cached_tool_call(tool, args: Dict[str, Any]):
+    """
+    검색 도구 .func() 실행 (캐시 우선, 동기 함수 - to_thread로 호출)
+
+    정상 결과((content, artifacts) 튜플)만 캐시하고,
+    도구가 오류 시 반환하는 문자열/빈 리스트는 캐시하지 않습니다.
+
+    Args:
+        tool: @tool 데코레이터가 적용된 검색 도구
+        args: 도구 인자 (예: {"query": "..."})
+
+    Returns:
+        도구 .func()의 반환값
+    """
+    if settings.RETRIEVAL_CACHE_SIZE <= 0:
+        return tool.func(**args)
+
+    key = _make_key(tool.name, args)
+    cached = _retrieval_cache.get(key)
+    if cached is not None:
+        logger.info("⚡ 검색 캐시 적중: %s", tool.name)
+        return cached
+
+    result = tool.func(**args)
+    if isinstance(result, tuple):
+        _retrieval_cache.set(key, result)
+    return result
+
+
+def clear_retrieval_cache() -> None:
+    """검색 결과 캐시 초기화"""
+    _retrieval_cache.clear()
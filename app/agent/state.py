@@ -21,6 +21,7 @@ class AgentState(TypedDict):
     
     # 2. 대화 이력 (reducer 사용)
     messages: Annotated[List[BaseMessage], add_messages]  # 대화 이력 (BaseMessage 객체)
+    _last_human_idx: Optional[int]  # 이번 턴 사용자 메시지(HumanMessage)의 messages 내 인덱스 (API 계층에서 기록)
     
     # 3. 내부 상태 (Internal State) - 노드 간 데이터 전달 및 제어용
     _intent: Optional[str] # 의도 분류 결과 ('relevant' | 'irrelevant')
@@ -28,6 +29,7 @@ class AgentState(TypedDict):
     # 검색된 문서 (평가 전/후)
     _retrieved_docs: Optional[List[RagDoc]] # RAG 검색된 문서 리스트 (DTO 사용)
     _qna_docs: Optional[List[QnADoc]] # QnA 검색된 문서 리스트 (DTO 사용)
+    _emergency_prefetched: Optional[bool]  # 의도 분류 중 응급 검색을 미리 완료했는지 여부 (emergency_response 재검색 생략)
     
     # Self-RAG 평가 관련
     _doc_relevance_score: Optional[float]  # 문서 관련성 점수 (0.0 ~ 1.0)
@@ -2,11 +2,13 @@
 Milvus 검색 도구 (Hybrid Search 구현)
 """
 from typing import List, Dict, Any, Optional
+from functools import lru_cache
 from langchain_core.tools import tool
 from pymilvus import Collection, AnnSearchRequest, Function, FunctionType
 from app.services.qna_service import search_qna # [추가]
 from app.core.database import get_milvus_client
-from app.core.config import get_embeddings
+from app.core.config import embed_query
+from app.core.llm_factory import get_generator_llm
 from app.core.milvus_schema import MILVUS_COLLECTION_NAME
 import logging
 
@@ -45,7 +47,7 @@ def retrieve_qna(query: str) -> str:
         logger.info(f"✅[QnA 검색 결과]")
         for doc in results:
             serialized_results.append({
-                "id": str(getattr(doc, "id", "")),
+                "id": getattr(doc, "id", None),
                 "question": getattr(doc, "question", ""),
                 "answer": getattr(doc, "answer", ""),
                 "source": getattr(doc, "source", ""),
@@ -65,11 +67,9 @@ def retrieve_qna(query: str) -> str:
 
 
 def get_embedding(text: str) -> List[float]:
-    """텍스트를 임베딩 모델로 임베딩 (싱글톤 사용)"""
+    """텍스트를 임베딩 모델로 임베딩 (싱글톤 + 쿼리 캐시 사용)"""
     try:
-        embeddings = get_embeddings()
-        embedding = embeddings.embed_query(text)
-        return embedding
+        return embed_query(text)
     except Exception as e:
         logger.error(f"임베딩 생성 실패: {str(e)}")
         raise
@@ -196,3 +196,19 @@ def milvus_knowledge_search(
         return []
 
 
+# Research Agent 도구 목록 (LLM 바인딩과 도구 실행에서 같은 목록을 공유)
+RESEARCH_TOOLS = (retrieve_qna, milvus_knowledge_search)
+
+
+@lru_cache(maxsize=1)
+def get_research_agent_llm():
+    """
+    Research Agent 도구 선택용 (생성 LLM + 검색 도구 바인딩)
+    도구 JSON 스키마 변환은 최초 1회만 수행하고, 바인딩된 Runnable을 재사용합니다.
+    parallel_tool_calls: QnA/문서 검색을 한 응답에서 함께 요청하도록 허용 (노드에서 동시 실행)
+    """
+    llm = get_generator_llm()
+    if llm is None:
+        return None
+    
+    return llm.bind_tools(list(RESEARCH_TOOLS), parallel_tool_calls=True)
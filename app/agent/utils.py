@@ -2,8 +2,8 @@
 Agent 모듈 유틸리티 함수
 ToolMessage 및 LLM 응답 파싱
 """
-import json
 import logging
+import orjson
 from typing import List, Callable, Awaitable
 from langchain_core.messages import BaseMessage
 import time
@@ -27,12 +27,12 @@ def parse_tool_result(content: str | list) -> list:
         return content
     if isinstance(content, str):
         try:
-            # JSON 문자열 파싱
-            parsed = json.loads(content)
+            # JSON 문자열 파싱 (orjson: C 구현 파서)
+            parsed = orjson.loads(content)
             if isinstance(parsed, list):
                 return parsed
             return []
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return []
     return []
 
@@ -54,8 +54,8 @@ def parse_json_from_response(text: str) -> dict:
         elif "```" in text:
             text = text.split("```")[1].split("```")[0].strip()
         
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         logger.error(f"JSON 파싱 실패: {text[:50]}...")
         return {}
     except Exception as e:
@@ -63,6 +63,47 @@ def parse_json_from_response(text: str) -> dict:
         return {}
 
 
+def find_last_human_index(messages: List[BaseMessage], hint: int | None = None) -> int:
+    """
+    마지막 사용자 메시지(HumanMessage)의 인덱스 반환
+    
+    hint(state["_last_human_idx"])가 유효하면 바로 반환하고,
+    아니면 뒤에서부터 인덱스로 한 번만 탐색합니다.
+    
+    Args:
+        messages: 메시지 리스트
+        hint: 기록된 이번 턴 HumanMessage 인덱스 (없으면 None)
+        
+    Returns:
+        HumanMessage 인덱스 (없으면 -1)
+    """
+    if hint is not None and 0 <= hint < len(messages) and messages[hint].type == "human":
+        return hint
+    
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].type == "human":
+            return i
+    return -1
+
+
+def get_last_human_content(state: AgentState) -> str:
+    """
+    이번 턴 사용자 메시지(HumanMessage) 내용 반환
+    
+    API 계층이 기록한 _last_human_idx로 바로 인덱싱하고,
+    인덱스가 없거나 어긋난 경우에만 대화 이력을 역순 탐색합니다.
+    
+    Args:
+        state: 현재 AgentState
+        
+    Returns:
+        마지막 사용자 메시지 내용 (없으면 빈 문자열)
+    """
+    messages = state.get("messages", [])
+    idx = find_last_human_index(messages, state.get("_last_human_idx"))
+    return messages[idx].content if idx >= 0 else ""
+
+
 def log_message_history(messages: List[BaseMessage], max_content_length: int = 100, context: str = ""):
     """
     메시지 히스토리를 요약하여 로깅
@@ -72,6 +113,10 @@ def log_message_history(messages: List[BaseMessage], max_content_length: int = 1
         max_content_length: 각 메시지 내용의 최대 표시 길이 (기본값: 100)
         context: 로그에 추가할 컨텍스트 문자열 (예: "generate_node", "intent_classifier")
     """
+    # INFO 비활성화 시 히스토리 요약 문자열 생성 자체를 생략
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     if not messages:
         context_str = f" [{context}]" if context else ""
         logger.info(f"📜 히스토리 없음 (첫 대화){context_str}")
@@ -106,8 +151,9 @@ def track_node_execution_time(node_name: str):
             start_time = time.time()
             try:
                 result = await func(state)
-                elapsed_time = time.time() - start_time
-                logger.info(f"====== ⏱️ [{node_name}] 실행 시간: {elapsed_time:.3f}초 ({elapsed_time*1000:.2f}ms) ⏱️ =======")
+                if logger.isEnabledFor(logging.INFO):
+                    elapsed_time = time.time() - start_time
+                    logger.info(f"====== ⏱️ [{node_name}] 실행 시간: {elapsed_time:.3f}초 ({elapsed_time*1000:.2f}ms) ⏱️ =======")
                 return result
             except Exception as e:
                 elapsed_time = time.time() - start_time
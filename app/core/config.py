@@ -2,7 +2,9 @@
 환경변수 로드 (.env)
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
+from array import array
 from langchain_openai import OpenAIEmbeddings
 import logging
 
@@ -40,7 +42,7 @@ class Settings(BaseSettings):
     LLAMAPARSE_API_KEY: Optional[str] = None  # LlamaParse API 키 (무료 사용량 제한 있음)
     LLAMAPARSE_OPENAI_MODEL: str = "openai-gpt-4o-mini" # LlamaParse 사용할 OpenAI 모델
     # OpenAI 모델 설정 (노드별)
-    OPENAI_MODEL_INTENT: str = "gpt-4o-mini"  # 의도 분류 모델
+    OPENAI_MODEL_INTENT: str = "gpt-4o-mini"  # 의도 분류 모델 (평가용 LLM: 의도 분류, 목표 파싱, 문서 평가)
     OPENAI_MODEL_REWRITE: str = "gpt-4o-mini"  # 쿼리 재작성 모델
     OPENAI_MODEL_GENERATION: str = "gpt-4o-mini"  # 답변 생성 모델
     OPENAI_MODEL_EMBEDDING: str = "text-embedding-3-small"  # 임베딩 모델
@@ -49,6 +51,47 @@ class Settings(BaseSettings):
     MAX_RAG_RETRIEVAL_ATTEMPTS: int = 3  # 최대 RAG 검색 시도 횟수
     MIN_RAG_SCORE_THRESHOLD: float = 0.8  # 최소 RAG 스코어 임계값
     
+    # LangGraph 체크포인터(Postgres) 커넥션 풀 설정 (워커 프로세스당)
+    CHECKPOINT_POOL_MIN: int = 1
+    CHECKPOINT_POOL_MAX: int = 4  # 단일 워커 기준, 운영 환경에서는 환경변수로 조정
+    CHECKPOINT_POOL_TIMEOUT: float = 10.0  # 풀에서 커넥션을 기다리는 최대 시간 (초)
+    CHECKPOINT_STATEMENT_TIMEOUT: str = "30s"  # 체크포인트 쿼리 statement_timeout
+    # 체크포인트 저장 시점: "exit"(실행 종료/interrupt 시에만), "async"(매 스텝 비동기), "sync"(매 스텝 동기)
+    CHECKPOINT_DURABILITY: str = "exit"
+    CHECKPOINT_ASYNC_COMMIT: bool = False  # True면 체크포인트 커밋 시 WAL fsync를 기다리지 않음 (synchronous_commit=off)
+    BEHIND_PGBOUNCER: bool = False  # PgBouncer(transaction mode) 경유 여부 (prepared statement 사용 불가)
+    CHECKPOINT_SKIP_SETUP: bool = False  # True면 부팅 시 스키마 setup 생략 (scripts/init_checkpoints.py로 사전 생성)
+    
+    # 에이전트 대화 이력 (새 턴 시작 시 DB에서 불러와 체크포인트 메시지를 교체할 최근 메시지 수)
+    AGENT_HISTORY_LIMIT: int = 10
+    
+    # 평가용 LLM 호출 제한 (출력이 짧은 JSON이므로 길이/대기 시간을 짧게 제한, 초과 시 각 노드의 기본값으로 진행)
+    EVALUATOR_MAX_TOKENS: int = 300
+    EVALUATOR_TIMEOUT: float = 10.0  # 요청당 타임아웃 (초)
+    EVALUATOR_MAX_RETRIES: int = 1
+    
+    # LLM 응답 캐시 (평가용 LLM)
+    EVALUATOR_LLM_CACHE_BACKEND: str = "memory"  # "memory"(프로세스 LRU) 또는 "redis"(워커 간 공유)
+    EVALUATOR_LLM_CACHE_SIZE: int = 1024  # memory 백엔드 최대 항목 수, 0이면 캐시 비활성화
+    EVALUATOR_LLM_CACHE_TTL: int = 86400  # redis 백엔드 항목 만료 시간 (초)
+    REDIS_URL: str = "redis://localhost:6379"
+    
+    # 쿼리 임베딩 캐시 (프로세스 메모리 LRU, 워커당 최대 항목 수)
+    EMBEDDING_CACHE_SIZE: int = 256
+    
+    # 검색 도구 결과 캐시 (같은 질의의 QnA/Milvus 검색 결과 재사용, 프로세스 메모리 LRU + TTL)
+    RETRIEVAL_CACHE_SIZE: int = 512  # 0이면 캐시 비활성화
+    RETRIEVAL_CACHE_TTL: int = 300  # 항목 만료 시간 (초), 새 문서 업로드가 반영되기까지의 최대 지연
+    
+    # 의도 분류 키워드 사전 필터 (이전 대화 없는 명백한 육아 질문은 LLM 분류 생략, 응급 누락 위험이 있어 기본 비활성화)
+    INTENT_KEYWORD_PREFILTER: bool = False
+    IRRELEVANT_LLM_RESPONSE: bool = False  # True면 범위 밖 질문 거절 응답을 LLM으로 생성 (기본: 고정 문구)
+    # True면 문서 평가 LLM 호출을 생략하고 GROW 답변 생성 시 관련 문서 선별을 함께 수행 (LLM 왕복 1회 절감, 출처 목록은 미선별)
+    FUSE_DOC_EVALUATION: bool = False
+    # True면 위험 신호가 있는 질문에 한해 의도 분류 LLM 호출과 동시에 응급 검색(QnA+Milvus)을 미리 시작
+    # (응급이 아니어도 임베딩 1회 + 검색 2회 비용은 그대로 발생)
+    EMERGENCY_SPECULATIVE_RETRIEVAL: bool = False
+    
     # 환경 설정
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
@@ -96,9 +139,26 @@ def get_embeddings() -> OpenAIEmbeddings:
     return _embeddings
 
 
+@lru_cache(maxsize=settings.EMBEDDING_CACHE_SIZE)
+def _embed_query_cached(text: str) -> array:
+    """쿼리 임베딩 (텍스트별 캐시, float32 배열로 압축 보관: 1536차원 기준 항목당 약 6KB)"""
+    return array("f", get_embeddings().embed_query(text))
+
+
+def embed_query(text: str) -> List[float]:
+    """
+    검색 쿼리 임베딩 (공백 정규화 후 프로세스 내 LRU 캐시)
+    
+    같은 질문이 응급 경로와 QnA/문서 검색에서 반복 임베딩되므로,
+    동일 쿼리는 임베딩 API 왕복 없이 캐시된 벡터를 재사용합니다.
+    """
+    return list(_embed_query_cached(" ".join(text.split())))
+
+
 def reset_embeddings():
     """
     OpenAIEmbeddings 인스턴스 리셋 (테스트 또는 재초기화 시 사용)
     """
     global _embeddings
     _embeddings = None
+    _embed_query_cached.cache_clear()
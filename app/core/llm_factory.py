@@ -1,7 +1,54 @@
-from functools import lru_cache
+from functools import lru_cache, partial
+from typing import Type
+from pydantic import BaseModel
+from langchain_core.caches import BaseCache, InMemoryCache
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_openai import ChatOpenAI
 from app.core.config import settings
 
+
+def _build_evaluator_cache() -> BaseCache | bool:
+    """
+    평가 LLM 응답 캐시 생성
+    - memory: 프로세스 메모리 LRU (기본값)
+    - redis: 워커/재시작 간 공유되는 정확 일치 캐시 (TaskIQ와 같은 Redis 사용)
+    캐시를 쓰지 않으면 False를 반환합니다 (전역 캐시도 사용하지 않음).
+    """
+    if settings.EVALUATOR_LLM_CACHE_BACKEND == "redis":
+        from redis import Redis
+        from langchain_community.cache import RedisCache
+        
+        return RedisCache(
+            redis_=Redis.from_url(settings.REDIS_URL),
+            ttl=settings.EVALUATOR_LLM_CACHE_TTL
+        )
+    
+    if settings.EVALUATOR_LLM_CACHE_SIZE > 0:
+        return InMemoryCache(maxsize=settings.EVALUATOR_LLM_CACHE_SIZE)
+    return False
+
+
+def _json_schema_response_format(schema: Type[BaseModel]) -> dict:
+    """Pydantic 스키마 -> OpenAI response_format (json_schema, strict)"""
+    function = convert_to_openai_tool(schema, strict=True)["function"]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": function["name"],
+            "description": function.get("description", ""),
+            "schema": function["parameters"],
+            "strict": True,
+        },
+    }
+
+
+def _parse_structured_content(message: AIMessage, schema: Type[BaseModel]) -> BaseModel:
+    """응답 content(JSON 문자열)를 스키마로 검증 (실패 시 ValidationError -> 각 노드의 기본값 처리)"""
+    return schema.model_validate_json(message.content)
+
+
 @lru_cache(maxsize=1)
 def get_generator_llm() -> ChatOpenAI | None:
     """
@@ -23,13 +70,57 @@ def get_evaluator_llm() -> ChatOpenAI | None:
     """
     의도 분류, 문서 평가, JSON 추출용 (정확성 필요)
     Temperature: 0.1
+    
+    출력이 짧은 판정 JSON이므로 의도 분류 모델(OPENAI_MODEL_INTENT)과 짧은 max_tokens/timeout을 사용합니다.
+    타임아웃 시 예외가 발생하며, 각 노드는 기존 기본값(relevant, 원문 목표, 문서 유지)으로 진행합니다.
+    
+    낮은 temperature의 판정 호출은 같은 프롬프트(질문 + 아기 정보 + 템플릿)에 대해
+    사실상 같은 결과를 내므로, 프롬프트/모델 설정을 키로 하는 LRU 캐시로 LLM 왕복을 생략합니다.
+    답변 생성 LLM은 창의성/재생성을 위해 캐시하지 않습니다.
     """
     if not settings.OPENAI_API_KEY:
         return None
-        
+    
     return ChatOpenAI(
         api_key=settings.OPENAI_API_KEY,
-        model=settings.OPENAI_MODEL_GENERATION,
+        model=settings.OPENAI_MODEL_INTENT,
         temperature=0.1,
-        max_tokens=600
+        max_tokens=settings.EVALUATOR_MAX_TOKENS,
+        timeout=settings.EVALUATOR_TIMEOUT,
+        max_retries=settings.EVALUATOR_MAX_RETRIES,
+        cache=_build_evaluator_cache()
     )
+
+
+
+@lru_cache(maxsize=None)
+def get_structured_evaluator_llm(schema: Type[BaseModel]):
+    """
+    구조화 출력 평가용 (평가 LLM + 스키마, 스키마별 캐시)
+    OpenAI json_schema 모드(strict)로 스키마에 맞는 JSON만 생성하게 하고,
+    응답 content(JSON 문자열)를 스키마로 검증해 인스턴스를 반환합니다.
+    
+    with_structured_output은 응답 메시지의 additional_kwargs["parsed"](Pydantic 객체)를 읽는데,
+    이 객체는 RedisCache의 직렬화(dumps/loads)를 통과하지 못해 캐시 적중 시 파싱이 실패합니다.
+    content만 사용하면 메모리/Redis 캐시 어느 쪽에서 꺼내도 같은 결과로 다시 파싱됩니다.
+    """
+    llm = get_evaluator_llm()
+    if llm is None:
+        return None
+    
+    return llm.bind(response_format=_json_schema_response_format(schema)) | RunnableLambda(
+        partial(_parse_structured_content, schema=schema)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_structured_generator_llm(schema: Type[BaseModel]):
+    """
+    구조화 출력 생성용 (생성 LLM + 스키마, 스키마별 캐시)
+    사용자에게 보여줄 문구를 JSON 필드로 받아야 하는 생성 호출(목표 선택지 등)에 사용합니다.
+    """
+    llm = get_generator_llm()
+    if llm is None:
+        return None
+    
+    return llm.with_structured_output(schema, method="json_schema")
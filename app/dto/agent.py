@@ -0,0 +1,31 @@
+"""
+에이전트 LLM 구조화 출력 스키마
+"""
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+class IntentResult(BaseModel):
+    """의도 분류 결과 (Intent Classifier 노드)"""
+    intent: Literal["emergency", "relevant", "irrelevant"] = Field(..., description="질문 의도 카테고리")
+    reason: str = Field(..., description="판단 이유")
+
+
+class GoalOptionsResult(BaseModel):
+    """목표 선택지 생성 결과 (Goal Options 노드)"""
+    empathy: str = Field(..., description="공감 문장 (1문장)")
+    options: List[str] = Field(..., description="목표 선택지 2~3개")
+    closing: str = Field(..., description="선택 유도 문구")
+
+
+class GoalSelectionResult(BaseModel):
+    """목표 선택 파싱 결과 (Goal Selector 노드)"""
+    goal: Optional[str] = Field(..., description="최종 목표 문장 (관련 없는 응답이면 null)")
+    is_relevant: bool = Field(..., description="사용자 응답이 목표 선택과 관련 있는지 여부")
+
+
+class DocRelevanceVerdict(BaseModel):
+    """문서 관련성 평가 결과 (Evaluate Docs 노드)"""
+    relevant_qna_indices: List[int] = Field(..., description="유용한 QnA 문서 번호 목록 (0부터 시작)")
+    relevant_rag_indices: List[int] = Field(..., description="유용한 RAG 문서 번호 목록 (0부터 시작)")
+    reason: str = Field(..., description="선별 이유 간단 설명")
@@ -7,11 +7,13 @@ from app.models.chat import ChatMessage, MessageRole
 from app.models.baby import BabyProfile
 from app.agent.graph import get_agent_graph
 from app.agent.state import AgentState
+from app.core.config import settings
 from app.dto.baby import AgeInfo, BabyAgentInfo
 from app.services.chat_repository import get_or_create_session, get_conversation_history
 from typing import Any, AsyncGenerator, Dict, List, Tuple
 from langgraph.types import Command
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, RemoveMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 import uuid
 import time
 import asyncio
@@ -76,7 +78,7 @@ def _load_session_data(db: Session, user_id: uuid.UUID, baby_id: uuid.UUID, sess
 
 def _load_conversation_history(db: Session, session_id: uuid.UUID) -> List:
     """동기 DB 작업: 대화 이력 로드 (to_thread로 호출)"""
-    return get_conversation_history(db, session_id)
+    return get_conversation_history(db, session_id, limit=settings.AGENT_HISTORY_LIMIT)
 
 
 def _save_results_to_db(
@@ -211,6 +213,13 @@ async def send_message(
         
         final_state = {}
         
+        # 재개 시 이번 턴 HumanMessage가 들어갈 인덱스 계산 기준 (add_messages는 id 없는 메시지를 뒤에 추가)
+        existing_message_count = (
+            len(existing_state.values.get("messages", []))
+            if existing_state and existing_state.values
+            else 0
+        )
+        
         if is_resuming:
             # ===== HITL 재개 모드 =====
             # 사용자 응답을 resume 값으로 전달하여 interrupted 그래프를 재개
@@ -219,7 +228,8 @@ async def send_message(
             graph_input = Command(
                 resume=question,
                 update={
-                    "messages": [HumanMessage(content=question)]
+                    "messages": [HumanMessage(content=question)],
+                    "_last_human_idx": existing_message_count
                 }
             )
         else:
@@ -247,10 +257,14 @@ async def send_message(
                 "previous_question": question,
                 "session_id": session.id,
                 "user_id": user_id,
-                "messages": history_messages,
+                # 체크포인트의 이전 메시지는 DB 이력과 중복되므로 비우고, 최근 DB 이력 창으로 교체
+                # (턴마다 이력이 다시 누적되어 체크포인트가 무한히 커지는 것을 방지)
+                "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *history_messages],
+                "_last_human_idx": len(history_messages) - 1,
                 "baby_info": _prepare_baby_info(baby).model_dump(),
                 "_retrieved_docs": [],
                 "_qna_docs": [],
+                "_emergency_prefetched": False,
                 "_doc_relevance_score": None,
                 "_doc_relevance_passed": False,
                 "response": "",
@@ -263,7 +277,13 @@ async def send_message(
         
         # 6. astream_events로 토큰 단위 스트리밍
         # coach_agent, closing 노드에서 "stream_response" 태그가 붙은 LLM 호출만 스트리밍
-        async for event in agent_graph.astream_events(graph_input, config=config, version="v2"):
+        # durability="exit": 중간 스텝마다 체크포인트를 쓰지 않고, interrupt/종료 시점에만 저장
+        async for event in agent_graph.astream_events(
+            graph_input,
+            config=config,
+            version="v2",
+            durability=settings.CHECKPOINT_DURABILITY
+        ):
             event_type = event.get("event")
             data = event.get("data", {})
             tags = event.get("tags", [])
@@ -6,6 +6,7 @@ from fastapi import HTTPException, status, UploadFile
 from app.models.knowledge import KnowledgeDoc
 from app.core.milvus_schema import MILVUS_COLLECTION_NAME, create_milvus_collection
 from app.core.database import get_milvus_client
+from app.agent.retrieval_cache import clear_retrieval_cache
 from app.dto.knowledge import BatchDocumentResult
 from app.services.s3_service import upload_to_s3, delete_from_s3, generate_storage_paths
 from app.services.parser_service import get_parser
@@ -198,6 +199,9 @@ def delete_document(
         
         logger.info(f"Milvus에서 문서 삭제 완료: doc_id={doc_id}")
         
+        # 삭제된 문서가 캐시된 검색 결과로 다시 노출되지 않도록 초기화
+        clear_retrieval_cache()
+        
     except Exception as e:
         logger.error(f"Milvus 삭제 실패: {str(e)}", exc_info=True)
     
@@ -5,7 +5,8 @@ from app.models.qna import OfficialQnA
 from app.dto.qna import QnADoc
 from app.core.milvus_schema import create_qna_collection, OFFICIAL_QNA_COLLECTION_NAME
 from app.core.database import get_milvus_client
-from app.core.config import get_embeddings
+from app.core.config import get_embeddings, embed_query
+from app.agent.retrieval_cache import clear_retrieval_cache
 from pymilvus import AnnSearchRequest, Function, FunctionType
 
 logger = logging.getLogger(__name__)
@@ -19,8 +20,7 @@ def search_qna(query: str, limit: int = 5) -> List[QnADoc]:
         client = get_milvus_client() 
 
         # 2. [Dense Search] 요청서 작성 (의미 검색)
-        embeddings_client = get_embeddings()
-        query_embedding = embeddings_client.embed_query(query)
+        query_embedding = embed_query(query)
         
         dense_req = AnnSearchRequest(
             data=[query_embedding],     # 벡터 데이터
@@ -126,6 +126,9 @@ def ingest_qna(db: Session, question: str, answer: str, source: str, category: s
         
         logger.info(f"QnA 등록 완료: ID={db_qna.id}, 질문={question}")
         
+        # 새 QnA가 검색 결과에 바로 반영되도록 캐시 초기화
+        clear_retrieval_cache()
+        
         return db_qna
         
     except Exception as e:
@@ -209,6 +212,9 @@ def sync_all_qna_to_milvus(db: Session) -> int:
         
         client.load_collection(OFFICIAL_QNA_COLLECTION_NAME)
         
+        # 컬렉션을 재생성했으므로 이전 검색 결과 캐시 초기화
+        clear_retrieval_cache()
+        
         logger.info(f"QnA 동기화 완료: 총 {total_count}개 문서 저장됨")
             
         return total_count
@@ -24,6 +24,7 @@ from app.core.milvus_schema import MILVUS_COLLECTION_NAME
 from app.core.database import get_milvus_client
 from app.core.config import settings, get_embeddings
 from app.core.milvus_schema import create_milvus_collection
+from app.agent.retrieval_cache import clear_retrieval_cache
 
 logger = logging.getLogger(__name__)
 
@@ -204,6 +205,9 @@ async def process_document_task(
             milvus_inserted = True
             logger.info(f"Milvus 저장 완료: 총 {total_count}개 청크")
             
+            # 워커 프로세스 내 검색 캐시 초기화 (API 프로세스 캐시는 RETRIEVAL_CACHE_TTL 이후 만료)
+            clear_retrieval_cache()
+            
         except Exception as e:
             logger.error(f"Milvus 저장 실패: {e}")
             raise e
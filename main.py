@@ -2,6 +2,7 @@
 App 진입점 (FastAPI 인스턴스 생성)
 """
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -13,6 +14,7 @@ from app.api.v1.admin import (
     feedback as admin_feedback,
     chat_history as admin_chat_history
 )
+from app.agent.graph import get_agent_graph, close_agent_graph
 from app.core.config import settings
 from app.core.database import Base, engine
 from app.models import *
@@ -29,7 +31,25 @@ logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
 Base.metadata.create_all(bind=engine)
 
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 생명주기: 시작 시 체크포인터 커넥션 풀/그래프 미리 준비, 종료 시 풀 정리"""
+    try:
+        # 첫 사용자 요청이 커넥션 연결/스키마 확인 지연을 부담하지 않도록 부팅 시 초기화
+        await get_agent_graph()
+    except Exception as e:
+        # DB 일시 장애로 부팅이 막히지 않도록 경고만 남기고, 첫 요청에서 다시 초기화 시도
+        logger.warning("에이전트 그래프 사전 초기화 실패 (첫 요청 시 재시도): %s", e)
+    yield
+    await close_agent_graph()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="TODAC 미숙아 챗봇 API",
     description="미숙아 챗봇 백엔드 API",
     version="1.0.0",
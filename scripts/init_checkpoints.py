@@ -0,0 +1,34 @@
+"""
+LangGraph 체크포인트 스키마 초기화 스크립트 (배포 시 1회 실행)
+
+워커 프로세스들이 부팅할 때마다 setup() DDL을 경쟁적으로 실행하지 않도록,
+배포 파이프라인(또는 init 컨테이너)에서 한 번만 실행하고
+애플리케이션은 CHECKPOINT_SKIP_SETUP=True 로 띄웁니다.
+
+Usage:
+    python -m scripts.init_checkpoints
+"""
+import asyncio
+import logging
+from psycopg import AsyncConnection
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from app.agent.checkpoint import apply_checkpoint_compression, checkpoint_connection_kwargs
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    # 애플리케이션 풀과 같은 커넥션 옵션 사용 (PgBouncer 경유 시 prepared statement 비활성화 등)
+    async with await AsyncConnection.connect(
+        settings.DATABASE_URL, **checkpoint_connection_kwargs()
+    ) as conn:
+        checkpointer = AsyncPostgresSaver(conn=conn)
+        await checkpointer.setup()
+        await apply_checkpoint_compression(conn)
+    logger.info("✅ 체크포인트 스키마 초기화 완료")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+평가 LLM 구조화 출력 + 응답 캐시 왕복 테스트
+"""
+import pytest
+from langchain_core.caches import BaseCache
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, HumanMessage
+from app.core import llm_factory
+from app.dto.agent import IntentResult
+
+
+class _SerializingCache(BaseCache):
+    """RedisCache와 같은 방식(langchain dumps/loads)으로 응답을 직렬화해 저장하는 테스트용 캐시"""
+
+    def __init__(self):
+        self._store = {}
+
+    def lookup(self, prompt, llm_string):
+        raw = self._store.get((prompt, llm_string))
+        return [loads(r) for r in raw] if raw is not None else None
+
+    def update(self, prompt, llm_string, return_val):
+        self._store[(prompt, llm_string)] = [dumps(g) for g in return_val]
+
+    def clear(self, **kwargs):
+        self._store.clear()
+
+
+@pytest.fixture
+def cached_evaluator(monkeypatch):
+    """응답 1개만 가진 가짜 평가 LLM (두 번째 호출은 캐시에서만 응답 가능)"""
+    fake = GenericFakeChatModel(
+        messages=iter([
+            AIMessage(
+                content='{"intent": "emergency", "reason": "호흡곤란"}',
+                additional_kwargs={"refusal": None},
+            )
+        ]),
+        cache=_SerializingCache(),
+    )
+    monkeypatch.setattr(llm_factory, "get_evaluator_llm", lambda: fake)
+    llm_factory.get_structured_evaluator_llm.cache_clear()
+    yield fake
+    llm_factory.get_structured_evaluator_llm.cache_clear()
+
+
+def test_structured_evaluator_parses_after_cache_round_trip(cached_evaluator):
+    llm = llm_factory.get_structured_evaluator_llm(IntentResult)
+    messages = [HumanMessage(content="아기가 숨을 잘 못 쉬어요")]
+
+    first = llm.invoke(messages)
+    second = llm.invoke(messages)  # 가짜 모델 응답이 소진되었으므로 캐시 적중이어야 함
+
+    assert first == IntentResult(intent="emergency", reason="호흡곤란")
+    assert second == first